@@ -0,0 +1,126 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+from formatter import parse_sections
+from validation import is_marketing_context
+
+
+def read_topics(path: str) -> list:
+    topics = []
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line in f:
+                line = line.strip()
+                if line:
+                    topics.append(json.loads(line)["topic"])
+        else:
+            reader = csv.reader(f)
+            for row in reader:
+                if not row or not row[0].strip():
+                    continue
+                # lewati header "topic" jika ada
+                if not topics and row[0].strip().lower() == "topic":
+                    continue
+                topics.append(row[0].strip())
+    return topics
+
+
+def read_done(path: str) -> set:
+    # topik yang sudah selesai (ok/invalid) tidak diulang saat resume
+    done = set()
+    if not os.path.exists(path):
+        return done
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("status") in ("ok", "invalid"):
+                done.add(record["topic"])
+    return done
+
+
+def write_record(out, record: dict):
+    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    out.flush()
+
+
+def run_batch(input_path: str, output_path: str, max_concurrency: int = 4,
+              bypass_cache: bool = False) -> dict:
+    from llm import generate_marketing_batch
+
+    topics = read_topics(input_path)
+    done = read_done(output_path)
+    todo = [t for t in dict.fromkeys(topics) if t not in done]
+
+    stats = {"total": len(todo), "ok": 0, "invalid": 0, "error": 0,
+             "output_tokens": 0}
+    started = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        valid = []
+        for topic in todo:
+            if is_marketing_context(topic):
+                valid.append(topic)
+            else:
+                stats["invalid"] += 1
+                write_record(out, {"topic": topic, "status": "invalid"})
+
+        for idx, result, usage in generate_marketing_batch(
+            valid, max_concurrency=max_concurrency, bypass_cache=bypass_cache
+        ):
+            topic = valid[idx]
+            if isinstance(result, Exception):
+                stats["error"] += 1
+                write_record(out, {"topic": topic, "status": "error",
+                                   "error": repr(result)})
+                continue
+
+            stats["ok"] += 1
+            stats["output_tokens"] += usage.get("output_tokens", 0)
+            write_record(out, {
+                "topic": topic,
+                "status": "ok",
+                "sections": parse_sections(result),
+                "raw": result,
+            })
+
+    elapsed = time.perf_counter() - started
+    stats["seconds"] = elapsed
+    stats["items_per_s"] = stats["ok"] / elapsed if elapsed else 0.0
+    stats["tokens_per_s"] = stats["output_tokens"] / elapsed if elapsed else 0.0
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Generate SEO pack untuk banyak topik sekaligus."
+    )
+    parser.add_argument("input", help="file CSV (kolom pertama) atau JSONL ({\"topic\": ...})")
+    parser.add_argument("-o", "--output", default="batch_output.jsonl",
+                        help="file JSONL hasil (dilanjutkan jika sudah ada)")
+    parser.add_argument("-c", "--max-concurrency", type=int, default=4)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="abaikan cache dan generate ulang")
+    args = parser.parse_args(argv)
+
+    stats = run_batch(args.input, args.output,
+                      max_concurrency=args.max_concurrency,
+                      bypass_cache=args.no_cache)
+
+    print(
+        f"{stats['ok']}/{stats['total']} ok, {stats['invalid']} invalid, "
+        f"{stats['error']} error dalam {stats['seconds']:.1f}s "
+        f"({stats['items_per_s']:.2f} item/s, {stats['tokens_per_s']:.1f} token/s)"
+    )
+    return 1 if stats["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from samples import sample_response
+
+# ~4 karakter per token, sama dengan estimasi di memory.count_tokens
+CHARS_PER_TOKEN = 4
+
+
+class FakeGroqServer:
+    # pengganti lokal endpoint chat-completions Groq (format OpenAI),
+    # dipakai lewat GROQ_API_BASE supaya benchmark tidak butuh jaringan/kuota
+    def __init__(self, latency: float = 0.2, tokens_per_second: float = 500,
+                 error_rate: float = 0.0, response: str = None,
+                 host: str = "127.0.0.1", port: int = 0, seed: int = 11,
+                 violation_rate: float = 0.0, responder=None,
+                 prefill_tokens_per_second: float = 0, error_status: int = 429):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        # responder(messages) -> teks: jawaban yang bergantung pada isi prompt
+        self.responder = responder
+        # waktu baca prompt (prefill); 0 = tidak bergantung panjang prompt
+        self.prefill_tokens_per_second = prefill_tokens_per_second
+        self.error_rate = error_rate
+        # 429 = rate limit (boleh di-retry/fallback), mis. 400 = error permanen
+        self.error_status = error_status
+        self.violation_rate = violation_rate
+        self.response = response or sample_response()
+        # SEO_TITLE melebihi 60 karakter, memicu perbaikan parsial di app
+        self.violating_response = self.response.replace(
+            "SEO_TITLE: ", "SEO_TITLE: Panduan Lengkap dan Terpercaya untuk ", 1
+        )
+        self.stats = {"requests": 0, "streams": 0, "rate_limited": 0, "tool_calls": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-groq", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.stats["requests"] += 1
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.stats["rate_limited"] += 1
+            return fail
+
+    def _pick_response(self) -> str:
+        with self._lock:
+            violate = self._random.random() < self.violation_rate
+        return self.violating_response if violate else self.response
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status: int, payload: dict, headers: dict = None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.rstrip("/").endswith("/models"):
+                    self._send_json(200, {"object": "list", "data": []})
+                else:
+                    self._send_json(404, {"error": {"message": "not found"}})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+
+                if not self.path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+
+                if server._should_fail():
+                    if server.error_status == 429:
+                        self._send_json(
+                            429,
+                            {"error": {"message": "Rate limit reached", "type": "tokens",
+                                       "code": "rate_limit_exceeded"}},
+                            {"retry-after": "0"},
+                        )
+                    else:
+                        self._send_json(
+                            server.error_status,
+                            {"error": {"message": "Invalid request",
+                                       "type": "invalid_request_error"}},
+                        )
+                    return
+
+                prompt_chars = sum(
+                    len(m.get("content") or "") for m in request.get("messages", [])
+                )
+                if request.get("tools"):
+                    text = self._tool_arguments(request)
+                elif server.responder is not None:
+                    text = server.responder(request.get("messages", []))
+                else:
+                    text = server._pick_response()
+                usage = {
+                    "prompt_tokens": prompt_chars // CHARS_PER_TOKEN + 1,
+                    "completion_tokens": len(text) // CHARS_PER_TOKEN + 1,
+                }
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+                delay = server.latency
+                if server.prefill_tokens_per_second:
+                    delay += usage["prompt_tokens"] / server.prefill_tokens_per_second
+                time.sleep(delay)
+                if request.get("stream"):
+                    self._stream(request, text, usage)
+                else:
+                    self._complete(request, text, usage)
+
+            def _tool_arguments(self, request: dict) -> str:
+                # structured output: isi setiap field schema dengan teks pendek
+                with server._lock:
+                    server.stats["tool_calls"] += 1
+                parameters = request["tools"][0]["function"].get("parameters", {})
+                return json.dumps(self._fill(parameters))
+
+            def _fill(self, spec: dict, name: str = "", idx: int = 0):
+                if spec.get("type") == "object":
+                    return {
+                        key: self._fill(child, key, idx)
+                        for key, child in spec.get("properties", {}).items()
+                    }
+                if spec.get("type") == "array":
+                    return [self._fill(spec.get("items", {}), name, i) for i in range(5)]
+                value = f"{name.replace('_', ' ')} hasil perbaikan {idx + 1}"
+                return value[:spec.get("maxLength", len(value))]
+
+            def _chunk_payload(self, request: dict, completion_id: str, delta: dict,
+                               finish_reason: str = None, usage: dict = None) -> bytes:
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model"),
+                    "choices": [{"index": 0, "delta": delta,
+                                 "finish_reason": finish_reason}],
+                }
+                if usage is not None:
+                    chunk["x_groq"] = {"id": completion_id, "usage": usage}
+                return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+            def _stream(self, request: dict, text: str, usage: dict):
+                with server._lock:
+                    server.stats["streams"] += 1
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+                # satu chunk ≈ satu kata, dikirim sesuai token rate
+                words = text.split(" ")
+                interval = (
+                    usage["completion_tokens"] / server.tokens_per_second / len(words)
+                    if server.tokens_per_second else 0
+                )
+                self.wfile.write(self._chunk_payload(
+                    request, completion_id, {"role": "assistant", "content": ""}
+                ))
+                for i, word in enumerate(words):
+                    text = word if i == len(words) - 1 else word + " "
+                    self.wfile.write(self._chunk_payload(
+                        request, completion_id, {"content": text}
+                    ))
+                    self.wfile.flush()
+                    if interval:
+                        time.sleep(interval)
+
+                # Groq mengirim usage di chunk terakhir (x_groq.usage)
+                self.wfile.write(self._chunk_payload(
+                    request, completion_id, {}, "stop", usage
+                ))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _complete(self, request: dict, text: str, usage: dict):
+                if server.tokens_per_second:
+                    time.sleep(usage["completion_tokens"] / server.tokens_per_second)
+
+                message = {"role": "assistant", "content": text}
+                finish_reason = "stop"
+                if request.get("tools"):
+                    function = request["tools"][0]["function"]["name"]
+                    message = {"role": "assistant", "content": None, "tool_calls": [{
+                        "id": f"call_{uuid.uuid4().hex[:12]}",
+                        "type": "function",
+                        "function": {"name": function, "arguments": text},
+                    }]}
+                    finish_reason = "tool_calls"
+
+                self._send_json(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get("model"),
+                    "choices": [{
+                        "index": 0,
+                        "message": message,
+                        "finish_reason": finish_reason,
+                    }],
+                    "usage": usage,
+                })
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server Groq palsu untuk benchmark lokal")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="detik sebelum token pertama")
+    parser.add_argument("--token-rate", type=float, default=500,
+                        help="token output per detik (0 = instan)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="proporsi request yang dijawab 429")
+    parser.add_argument("--violation-rate", type=float, default=0.0,
+                        help="proporsi jawaban dengan SEO_TITLE > 60 karakter")
+    args = parser.parse_args()
+
+    server = FakeGroqServer(args.latency, args.token_rate, args.error_rate, port=args.port,
+                            violation_rate=args.violation_rate)
+    print(f"fake Groq di {server.url} — jalankan app dengan GROQ_API_BASE={server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import argparse
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_groq import FakeGroqServer  # noqa: E402
+from samples import TOPICS, sample_response  # noqa: E402
+
+TRACE_MEMORY = False
+
+PROMPTS = TOPICS + [
+    "halo apa kabar hari ini",
+    "select * from users",
+    "cara membuat kue bolu yang enak sekali",
+    "jasa renovasi rumah murah jakarta",
+]
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def max_rss_mib() -> float:
+    # ru_maxrss dalam KiB di Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def report(name: str, timings: list, elapsed: float, memory: str, extra: str = ""):
+    print(
+        f"{name:<10} n={len(timings):<6} "
+        f"p50 {percentile(timings, 0.50) * 1000:8.2f} ms  "
+        f"p95 {percentile(timings, 0.95) * 1000:8.2f} ms  "
+        f"p99 {percentile(timings, 0.99) * 1000:8.2f} ms  "
+        f"{len(timings) / elapsed:9.1f} ops/s  {memory}"
+        + (f"  {extra}" if extra else "")
+    )
+
+
+def measure(fn, items: list, concurrency: int = 1):
+    # kembalikan (latency per item, total detik, keterangan memori)
+    def timed(item):
+        started = time.perf_counter()
+        fn(item)
+        return time.perf_counter() - started
+
+    # tracemalloc memperlambat kode yang banyak alokasi, jadi hanya opsional
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    rss_before = max_rss_mib()
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            timings = list(pool.map(timed, items))
+    else:
+        timings = [timed(item) for item in items]
+    elapsed = time.perf_counter() - started
+
+    if TRACE_MEMORY:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory = f"peak {peak / 1024 / 1024:6.2f} MiB"
+    else:
+        memory = f"rss +{max_rss_mib() - rss_before:5.1f} MiB"
+    return timings, elapsed, memory
+
+
+def output_tokens_total(llm) -> float:
+    # token output versi prompt aktif, dijumlah dari semua backend & jenis
+    # panggilan (termasuk perbaikan): throughput token yang benar-benar dihasilkan
+    models = llm.usage_stats().get(llm.PROMPT_VERSION, {}).values()
+    return sum(
+        s["avg_output_tokens"] * s["requests"]
+        for kinds in models for s in kinds.values()
+    )
+
+
+def bench_generate(llm, requests: int, concurrency: int):
+    prompts = [PROMPTS[i % len(TOPICS)] for i in range(requests)]
+    tokens_before = output_tokens_total(llm)
+
+    timings, elapsed, memory = measure(
+        lambda p: llm.generate_marketing_content(p, bypass_cache=True),
+        prompts, concurrency
+    )
+
+    output_tokens = output_tokens_total(llm) - tokens_before
+    report("generate", timings, elapsed, memory,
+           f"{output_tokens / elapsed:8.0f} tok/s  retries {llm.resilience_stats()['retries']}")
+
+
+def bench_stream(llm, requests: int, concurrency: int):
+    first_tokens = []
+
+    def consume(prompt):
+        started = time.perf_counter()
+        for i, _ in enumerate(llm.stream_marketing_content(prompt, bypass_cache=True)):
+            if i == 0:
+                first_tokens.append(time.perf_counter() - started)
+
+    prompts = [TOPICS[i % len(TOPICS)] for i in range(requests)]
+    timings, elapsed, memory = measure(consume, prompts, concurrency)
+    report("stream", timings, elapsed, memory,
+           f"ttft p50 {percentile(first_tokens, 0.5) * 1000:.0f} ms")
+
+
+def bench_format(iterations: int):
+    from formatter import format_marketing_response
+
+    responses = [sample_response(topic) for topic in TOPICS]
+    timings, elapsed, memory = measure(
+        format_marketing_response,
+        [responses[i % len(responses)] for i in range(iterations)]
+    )
+    report("format", timings, elapsed, memory)
+
+
+def bench_persistence(iterations: int):
+    from storage import StoreRegistry
+
+    response = sample_response()
+    with tempfile.TemporaryDirectory() as folder:
+        store = StoreRegistry(folder).get("bench")
+
+        def save_turn(i):
+            prompt = f"{TOPICS[i % len(TOPICS)]} {i}"
+            store.append_message({"role": "user", "content": prompt})
+            store.append_message({"role": "assistant", "content": response})
+            store.add_history(prompt)
+
+        timings, elapsed, memory = measure(save_turn, list(range(iterations)))
+        report("persist", timings, elapsed, memory)
+
+        rng = random.Random(5)
+        prompts = store.load_history()
+        timings, elapsed, memory = measure(
+            store.load_turn, [rng.choice(prompts) for _ in range(iterations)]
+        )
+        report("load_turn", timings, elapsed, memory)
+
+
+def bench_validation(iterations: int):
+    from validation import is_marketing_context
+
+    timings, elapsed, memory = measure(
+        is_marketing_context, [PROMPTS[i % len(PROMPTS)] for i in range(iterations)]
+    )
+    report("validate", timings, elapsed, memory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline dengan server Groq palsu")
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--token-rate", type=float, default=5000)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--violation-rate", type=float, default=0.0,
+                        help="proporsi jawaban yang perlu perbaikan parsial")
+    parser.add_argument("--iterations", type=int, default=2000,
+                        help="jumlah operasi untuk benchmark non-LLM")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="puncak alokasi via tracemalloc (lebih lambat)")
+    args = parser.parse_args()
+
+    global TRACE_MEMORY
+    TRACE_MEMORY = args.trace_memory
+
+    with FakeGroqServer(args.latency, args.token_rate, args.error_rate,
+                        violation_rate=args.violation_rate) as server:
+        # harus di-set sebelum import llm: konfigurasi dibaca saat import
+        os.environ.update({
+            "GROQ_API_KEY": "fake-key",
+            "GROQ_API_BASE": server.url,
+            "LLM_CACHE_BACKEND": "off",
+            "LLM_SEMANTIC_CACHE": "off",
+            "LLM_USAGE_LOG": "off",
+            "LLM_RPM": "1000000",
+            "LLM_TPM": "1000000000",
+        })
+        import llm
+
+        # client & koneksi dibuat di luar pengukuran
+        llm.warm_up(background=False)
+
+        print(f"fake Groq {server.url}  latency {args.latency}s  "
+              f"{args.token_rate:.0f} tok/s  429 {args.error_rate:.0%}  "
+              f"concurrency {args.concurrency}\n")
+        bench_generate(llm, args.requests, args.concurrency)
+        bench_stream(llm, args.requests, args.concurrency)
+        bench_format(args.iterations)
+        bench_persistence(args.iterations)
+        bench_validation(args.iterations * 10)
+
+        print(f"\nserver: {server.stats}")
+    print(f"max RSS: {max_rss_mib():.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from formatter import format_marketing_response  # noqa: E402
+from samples import TOPICS, sample_response  # noqa: E402
+
+
+def main():
+    cards = [format_marketing_response(sample_response(t)) for t in TOPICS]
+    per_card = sum(len(c.encode("utf-8")) for c in cards) / len(cards)
+    raw = sum(len(sample_response(t).encode("utf-8")) for t in TOPICS) / len(TOPICS)
+
+    print(f"konten mentah per card : {raw:,.0f} bytes")
+    print(f"HTML per card          : {per_card:,.0f} bytes")
+    print(f"overhead markup        : {per_card - raw:,.0f} bytes")
+    for n in (10, 50, 200):
+        print(f"history {n:>3} card     : {per_card * n / 1024:,.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
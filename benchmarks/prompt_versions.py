@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memory import count_tokens  # noqa: E402
+from prompts import PROMPT_VERSIONS  # noqa: E402
+from samples import TOPICS  # noqa: E402
+
+
+def static_report():
+    # estimasi kasar (len/4) — angka pasti dari usage Groq di run live
+    print("prompt sistem per versi:")
+    for version, content in PROMPT_VERSIONS.items():
+        print(f"  {version:<8} {len(content):>5} karakter  ~{count_tokens(content):>4} token")
+
+
+def live_report():
+    # topik tetap, cache dimatikan, usage dicatat per versi oleh llm.usage_tracker
+    import llm
+
+    for version in PROMPT_VERSIONS:
+        for topic in TOPICS:
+            started = time.perf_counter()
+            llm.generate_marketing_content(topic, bypass_cache=True, prompt_version=version)
+            print(f"  {version:<8} {topic:<32} {time.perf_counter() - started:.2f} s")
+
+    print("\nrata-rata per versi & model (SEO pack; perbaikan & variasi terpisah):")
+    for version, models in llm.usage_stats().items():
+        for model, kinds in models.items():
+            for kind, stats in sorted(kinds.items(), key=lambda item: item[0] != "pack"):
+                print(f"  {version:<8} {model:<40} {kind:<9} "
+                      f"n={stats['requests']:<3} input {stats['avg_input_tokens']:.0f}  "
+                      f"output {stats['avg_output_tokens']:.0f}  "
+                      f"latency {stats['avg_seconds']:.2f} s")
+
+
+def main():
+    static_report()
+
+    if not os.getenv("GROQ_API_KEY"):
+        print("\nGROQ_API_KEY tidak di-set, perbandingan live dilewati.")
+        return
+
+    print()
+    live_report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from formatter import parse_marketing_response  # noqa: E402
+from memory import count_tokens  # noqa: E402
+from prompts import PROMPT_VERSIONS, prompt_hash  # noqa: E402
+from samples import TOPICS, standin_response  # noqa: E402
+from schema import SNIPPET_WORDS, find_violations  # noqa: E402
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# jawaban model yang direkam per versi prompt (satu JSONL per versi)
+RECORDED_DIR = os.path.join(BENCH_DIR, "recorded")
+
+# angka acuan per sumber & versi; dibandingkan dengan run berikutnya
+BASELINE_FILE = os.path.join(BENCH_DIR, "regression_baseline.json")
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def check_limits(text: str) -> list:
+    # pelanggaran batas keras prompt sistem pada jawaban mentah (sebelum perbaikan)
+    sections = parse_marketing_response(text)
+    problems = [f"{name}: {reason}" for name, reason in find_violations(sections).items()]
+
+    words = len((sections.content_snippet or "").split())
+    low, high = SNIPPET_WORDS
+    if sections.content_snippet and not low <= words <= high:
+        problems.append(f"content_snippet: {words} kata, harus {low}–{high}")
+    return problems
+
+
+def recording_path(version: str) -> str:
+    return os.path.join(RECORDED_DIR, f"{version}.jsonl")
+
+
+def load_recording(version: str) -> list:
+    path = recording_path(version)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_recording(version: str, samples: list):
+    os.makedirs(RECORDED_DIR, exist_ok=True)
+    with open(recording_path(version), "w", encoding="utf-8") as f:
+        for sample in samples:
+            f.write(json.dumps(sample, ensure_ascii=False) + "\n")
+
+
+# stand-in lokal: latency ikut panjang prompt (prefill) dan panjang jawaban
+STANDIN_TOKENS_PER_SECOND = 4000
+STANDIN_PREFILL_TOKENS_PER_SECOND = 20000
+STANDIN_MODEL = "stand-in"
+
+
+def standin_seconds(usage: dict, latency: float) -> float:
+    # waktu generate stand-in dihitung dari jumlah token (model yang sama dengan
+    # jeda server palsu), bukan jam dinding: hasilnya sama di mesin mana pun
+    return (
+        latency
+        + usage.get("input_tokens", 0) / STANDIN_PREFILL_TOKENS_PER_SECOND
+        + usage.get("output_tokens", 0) / STANDIN_TOKENS_PER_SECOND
+    )
+
+
+def standin_reply(messages: list) -> str:
+    # prompt sistem di posisi pertama, topik di pesan terakhir
+    return standin_response(messages[0]["content"], messages[-1]["content"])
+
+
+def generate_samples(version: str, topics: list, model: str = None,
+                     timing=None) -> list:
+    # panggil model langsung (tanpa cache & tanpa perbaikan) supaya yang
+    # diukur benar-benar output prompt versi ini; timing(usage) -> detik
+    # menggantikan jam dinding (stand-in)
+    import llm
+
+    samples = []
+    for topic in topics:
+        messages = llm.build_messages(topic, prompt_version=version)
+        started = time.perf_counter()
+        response = llm.caller.call(
+            lambda: llm.router.invoke(lambda client: client.invoke(messages)),
+            llm.estimate_tokens(messages)
+        )
+        seconds = time.perf_counter() - started
+
+        usage = response.usage_metadata or {}
+        if timing is not None:
+            seconds = timing(usage)
+        samples.append({
+            "topic": topic,
+            "prompt_hash": prompt_hash(version),
+            "model": model or llm.router.signature(),
+            "response": response.content,
+            "output_tokens": usage.get("output_tokens") or count_tokens(response.content),
+            "seconds": seconds,
+        })
+    return samples
+
+
+def summarize(samples: list) -> dict:
+    tokens = [s["output_tokens"] for s in samples]
+    seconds = [s["seconds"] for s in samples]
+    failures = {s["topic"]: check_limits(s["response"]) for s in samples}
+    return {
+        "samples": len(samples),
+        "avg_output_tokens": sum(tokens) / len(tokens),
+        "p50_seconds": percentile(seconds, 0.5),
+        "p95_seconds": percentile(seconds, 0.95),
+        "limit_failures": {topic: found for topic, found in failures.items() if found},
+    }
+
+
+def compare(current: dict, baseline: dict, max_token_growth: float,
+            max_latency_growth: float) -> list:
+    regressions = []
+    checks = [
+        ("avg_output_tokens", max_token_growth),
+        ("p95_seconds", max_latency_growth),
+    ]
+    for key, allowed in checks:
+        before, after = baseline.get(key), current[key]
+        if before and after > before * (1 + allowed):
+            regressions.append(
+                f"{key} {before:.2f} → {after:.2f} (+{after / before - 1:.0%}, "
+                f"batas +{allowed:.0%})"
+            )
+    return regressions
+
+
+def collect(source: str, version: str, topics: list, record: bool,
+            latency: float = 0.0) -> tuple:
+    # (samples, catatan); samples None berarti versi ini tidak bisa dicek
+    if source == "replay":
+        samples = load_recording(version)
+        if samples is None:
+            return None, "belum direkam (jalankan --source live --record)"
+        if any(s["prompt_hash"] != prompt_hash(version) for s in samples):
+            # prompt berubah sejak direkam: rekaman lama tidak mewakili lagi
+            return samples, "STALE: prompt berubah sejak direkam, rekam ulang"
+        return samples, None
+
+    if source == "fake":
+        samples = generate_samples(
+            version, topics, STANDIN_MODEL,
+            timing=lambda usage: standin_seconds(usage, latency)
+        )
+    else:
+        samples = generate_samples(version, topics)
+    if record:
+        save_recording(version, samples)
+    return samples, None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Regression suite kualitas & latency per versi prompt"
+    )
+    parser.add_argument("--source", choices=["replay", "fake", "live"], default="replay",
+                        help="replay = jawaban terekam, fake = stand-in lokal yang "
+                             "mengikuti batas di prompt, live = API Groq sungguhan")
+    parser.add_argument("--versions", default=",".join(PROMPT_VERSIONS))
+    parser.add_argument("--record", action="store_true",
+                        help="simpan jawaban (live/fake) sebagai rekaman replay")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="jadikan hasil run ini sebagai baseline")
+    parser.add_argument("--max-token-growth", type=float, default=0.10)
+    parser.add_argument("--max-latency-growth", type=float, default=0.25)
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="latency server palsu (--source fake)")
+    args = parser.parse_args()
+
+    versions = [v for v in args.versions.split(",") if v]
+    server = None
+    if args.source == "fake":
+        from fake_groq import FakeGroqServer
+        server = FakeGroqServer(
+            args.latency, STANDIN_TOKENS_PER_SECOND,
+            responder=standin_reply,
+            prefill_tokens_per_second=STANDIN_PREFILL_TOKENS_PER_SECOND
+        ).start()
+        os.environ["GROQ_API_BASE"] = server.url
+        os.environ.setdefault("GROQ_API_KEY", "fake-key")
+
+    if args.source != "replay":
+        # harus di-set sebelum import llm: konfigurasi dibaca saat import
+        os.environ.update({
+            "LLM_CACHE_BACKEND": "off",
+            "LLM_SEMANTIC_CACHE": "off",
+            "LLM_USAGE_LOG": "off",
+        })
+        import llm
+        llm.warm_up(background=False)
+
+    baselines = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    baseline = baselines.setdefault(args.source, {})
+
+    failed = False
+    for version in versions:
+        samples, note = collect(args.source, version, TOPICS, args.record, args.latency)
+        if samples is None:
+            print(f"{version:<8} FAIL {note}")
+            failed = True
+            continue
+
+        if args.source == "replay" and all(s["model"] == STANDIN_MODEL for s in samples):
+            # jawaban stand-in dibentuk dari batas di prompt, bukan model: replay
+            # ini hanya bisa gagal karena prompt berubah (STALE) atau batas/angka
+            # acuan diubah, bukan karena kualitas model
+            print(f"{version:<8} catatan: rekaman dari stand-in lokal, bukan model "
+                  f"sungguhan (rekam dengan --source live --record)")
+
+        result = summarize(samples)
+        print(
+            f"{version:<8} n={result['samples']}  "
+            f"output {result['avg_output_tokens']:.0f} token  "
+            f"p50 {result['p50_seconds']:.2f} s  p95 {result['p95_seconds']:.2f} s"
+        )
+
+        problems = []
+        if note:
+            problems.append(note)
+        for topic, found in result["limit_failures"].items():
+            problems.extend(f"{topic}: {problem}" for problem in found)
+        if version in baseline and not args.update_baseline:
+            problems.extend(compare(
+                result, baseline[version], args.max_token_growth, args.max_latency_growth
+            ))
+
+        for problem in problems:
+            print(f"  FAIL {problem}")
+        failed = failed or bool(problems)
+
+        if args.update_baseline:
+            baseline[version] = {
+                "avg_output_tokens": result["avg_output_tokens"],
+                "p95_seconds": result["p95_seconds"],
+            }
+
+    if args.update_baseline:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline {args.source} diperbarui: {BASELINE_FILE}")
+
+    if server is not None:
+        server.stop()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_groq import FakeGroqServer  # noqa: E402
+from samples import TOPICS  # noqa: E402
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def make_router(servers: list, hedge_after: str = "off", admit=None):
+    import router
+    backends = [
+        router.Backend("groq", f"model-{i}", server.url)
+        for i, server in enumerate(servers)
+    ]
+    return router.ModelRouter(backends, hedge_after, admit=admit)
+
+
+def ask(pool) -> str:
+    from router import served_by
+    pool.invoke(lambda client: client.invoke("halo"))
+    return served_by()
+
+
+def check_ranking():
+    # backend tanpa sampel dicoba dulu, setelah itu p50 tercepat di depan
+    with FakeGroqServer(0.15, 0) as slow, FakeGroqServer(0.01, 0) as fast:
+        pool = make_router([slow, fast])
+        served = [ask(pool) for _ in range(10)]
+        assert served[1:] == ["groq:model-1"] * 9, served
+        assert pool.ranked()[0].name == "groq:model-1"
+
+
+def check_hedge():
+    import router
+    with FakeGroqServer(0.6, 0) as stuck, FakeGroqServer(0.01, 0) as spare:
+        # backend utama belum menjawab setelah tenggat: backend kedua menyusul
+        pool = make_router([stuck, spare], hedge_after="0.1")
+        started = time.perf_counter()
+        assert ask(pool) == "groq:model-1"
+        assert time.perf_counter() - started < 0.5
+        assert stuck.stats["requests"] == 1 and spare.stats["requests"] == 1
+
+        # tanpa kuota (admit False) hedge tidak dikirim
+        pool = make_router([stuck, spare], hedge_after="0.1", admit=lambda: False)
+        assert ask(pool) == "groq:model-0"
+        assert spare.stats["requests"] == 1, spare.stats
+
+    # tenggat auto: lonjakan 6% tidak menaikkan tenggat sampai lonjakan itu sendiri
+    backend = router.Backend("groq", "model-0")
+    for i in range(50):
+        backend.record("invoke", 1.0 if i % 16 == 0 else 0.1)
+    delay = router.ModelRouter([backend], "auto").hedge_delay(backend)
+    assert abs(delay - 0.1 * router.HEDGE_P50_MULTIPLIER) < 1e-9, delay
+
+
+def check_fallback():
+    from router import served_by
+    # 429 di backend utama: pindah ke backend berikutnya (invoke & stream)
+    with FakeGroqServer(0.01, 0, error_rate=1.0) as limited, \
+            FakeGroqServer(0.01, 0) as healthy:
+        pool = make_router([limited, healthy])
+        assert ask(pool) == "groq:model-1"
+        assert pool.backends[0].error_rate() == 1.0
+
+        pool = make_router([limited, healthy])
+        list(pool.stream(lambda client: client.stream("halo")))
+        assert served_by() == "groq:model-1"
+
+        # tanpa kuota fallback tidak dikirim, error 429 diteruskan ke caller
+        pool = make_router([limited, healthy], admit=lambda: False)
+        before = healthy.stats["requests"]
+        try:
+            ask(pool)
+        except Exception as exc:
+            assert getattr(exc, "status_code", None) == 429, exc
+        else:
+            raise AssertionError("429 tanpa kuota fallback harus diteruskan")
+        assert healthy.stats["requests"] == before
+
+
+def check_non_retryable():
+    # error permanen (400) tidak di-fallback: backend lain tidak dipanggil
+    with FakeGroqServer(0.01, 0, error_rate=1.0, error_status=400) as broken, \
+            FakeGroqServer(0.01, 0) as healthy:
+        pool = make_router([broken, healthy])
+        try:
+            ask(pool)
+        except Exception as exc:
+            assert getattr(exc, "status_code", None) == 400, exc
+        else:
+            raise AssertionError("error 400 harus diteruskan")
+        assert healthy.stats["requests"] == 0, healthy.stats
+
+
+def router_counters() -> dict:
+    from telemetry import registry
+    counters = {}
+    for line in registry.render_prometheus().splitlines():
+        if line.startswith("seo_router_"):
+            name, value = line.rsplit(" ", 1)
+            counters[name] = float(value)
+    return counters
+
+
+def run_checks() -> bool:
+    import router
+    os.environ.setdefault("GROQ_API_KEY", "fake-key")
+    # tanpa eksplorasi acak supaya urutan backend bisa dipastikan
+    explore_rate, router.EXPLORE_RATE = router.EXPLORE_RATE, 0.0
+    ok = True
+    try:
+        for check in (check_ranking, check_hedge, check_fallback, check_non_retryable):
+            try:
+                check()
+                print(f"  ok   {check.__name__}")
+            except AssertionError as exc:
+                print(f"  FAIL {check.__name__}: {exc}")
+                ok = False
+    finally:
+        router.EXPLORE_RATE = explore_rate
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Router multi-backend melawan dua server Groq palsu"
+    )
+    parser.add_argument("-n", "--requests", type=int, default=100)
+    parser.add_argument("--fast-latency", type=float, default=0.1,
+                        help="latency normal backend A (cepat, tapi kadang melonjak)")
+    parser.add_argument("--slow-latency", type=float, default=0.15,
+                        help="latency backend B (lebih lambat, stabil)")
+    parser.add_argument("--spike", type=float, default=0.04,
+                        help="proporsi request backend A yang melambat (x10)")
+    parser.add_argument("--error-rate", type=float, default=0.05,
+                        help="proporsi 429 di backend A")
+    parser.add_argument("--hedge-after", default="auto")
+    parser.add_argument("--checks-only", action="store_true",
+                        help="hanya jalankan cek perilaku router, tanpa benchmark")
+    args = parser.parse_args()
+
+    primary = FakeGroqServer(args.fast_latency, 0, args.error_rate, seed=1).start()
+    secondary = FakeGroqServer(args.slow_latency, 0, seed=2).start()
+
+    # backend A kadang melambat 10x (tail latency) untuk menguji hedging
+    spike_latency = args.fast_latency * 10
+    original_should_fail = primary._should_fail
+
+    def should_fail():
+        with primary._lock:
+            primary.latency = (
+                spike_latency if primary._random.random() < args.spike
+                else args.fast_latency
+            )
+        return original_should_fail()
+
+    primary._should_fail = should_fail
+
+    # harus di-set sebelum import llm: konfigurasi dibaca saat import
+    os.environ.update({
+        "GROQ_API_KEY": "fake-key",
+        "LLM_BACKENDS": f"groq:model-a@{primary.url},groq:model-b@{secondary.url}",
+        "LLM_HEDGE_AFTER": args.hedge_after,
+        "LLM_CACHE_BACKEND": "off",
+        "LLM_SEMANTIC_CACHE": "off",
+        "LLM_USAGE_LOG": "off",
+        "LLM_RPM": "1000000",
+        "LLM_TPM": "1000000000",
+    })
+
+    print("cek router (ranking, hedge, fallback 429, error permanen):")
+    if not run_checks() or args.checks_only:
+        primary.stop()
+        secondary.stop()
+        return 0 if args.checks_only else 1
+    print()
+
+    import llm
+
+    # counter router juga terisi oleh cek di atas: tampilkan selisihnya saja
+    counters_before = router_counters()
+    timings = []
+    for i in range(args.requests):
+        started = time.perf_counter()
+        llm.generate_marketing_content(TOPICS[i % len(TOPICS)], bypass_cache=True)
+        timings.append(time.perf_counter() - started)
+
+    print(f"hedge {args.hedge_after}  spike A {args.spike:.0%} x10  429 A {args.error_rate:.0%}")
+    print(f"latency p50 {percentile(timings, 0.5) * 1000:.0f} ms  "
+          f"p95 {percentile(timings, 0.95) * 1000:.0f} ms  "
+          f"p99 {percentile(timings, 0.99) * 1000:.0f} ms")
+    for name, stats in llm.router_stats().items():
+        print(f"  {name:<14} {stats}")
+    print(f"  server A {primary.stats}")
+    print(f"  server B {secondary.stats}")
+    print("  " + "  ".join(
+        f"{name} {value - counters_before.get(name, 0):.0f}"
+        for name, value in router_counters().items()
+    ))
+
+    primary.stop()
+    secondary.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
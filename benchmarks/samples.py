@@ -0,0 +1,70 @@
+import re
+
+TOPICS = [
+    "jasa renovasi rumah",
+    "produk skincare anti aging",
+    "jasa pembuatan website UMKM",
+    "travel umroh terpercaya",
+    "toko bunga online",
+    "jasa konstruksi gudang",
+    "bisnis katering makanan sehat",
+    "agency digital marketing",
+]
+
+SNIPPET_SENTENCE = (
+    "Renovasi rumah yang rapi dimulai dari perencanaan yang jujur soal anggaran, "
+    "material, dan jadwal kerja tukang di lapangan. "
+)
+
+
+def sample_response(topic: str = TOPICS[0], snippet_words: int = 400) -> str:
+    words = []
+    while len(words) < snippet_words:
+        words.extend(SNIPPET_SENTENCE.split())
+
+    return f"""SEO_TITLE: {topic.title()} Rapi dan Tepat Waktu
+META_DESCRIPTION: {topic.capitalize()} dengan perencanaan anggaran jelas, material terukur, dan tim lapangan yang bisa dihubungi kapan saja.
+FOCUS_KEYWORD: {topic}
+SECONDARY_KEYWORDS: {topic} murah, {topic} terdekat, biaya {topic}
+HASHTAGS: #{topic.replace(' ', '')} #bisnislokal #umkm
+CTA: Konsultasikan kebutuhan {topic} Anda hari ini.
+CONTENT_SNIPPET: {' '.join(words[:snippet_words])}
+"""
+
+
+# stand-in lokal untuk regression suite: mengikuti batas yang tertulis di
+# prompt sistem; tanpa batas eksplisit jawabannya melebar seperti model sungguhan
+UNBOUNDED_SNIPPET_WORDS = 650
+
+TITLE_TAIL = " Rapi dan Tepat Waktu, Dikerjakan Tim Berpengalaman di Kota Anda"
+META_TAIL = (
+    " dengan perencanaan anggaran jelas, material terukur, jadwal kerja yang disepakati "
+    "di awal, laporan progres mingguan, dan tim lapangan yang bisa dihubungi kapan saja "
+    "selama proyek berjalan."
+)
+
+
+def _prompt_limit(system_prompt: str, pattern: str):
+    match = re.search(pattern, system_prompt)
+    return tuple(int(n) for n in match.groups()) if match else None
+
+
+def _fit(text: str, limit) -> str:
+    # potong di batas kata terakhir yang masih muat (seperti model yang patuh)
+    if limit is None or len(text) <= limit:
+        return text
+    return text[:limit + 1].rsplit(" ", 1)[0].rstrip(" ,")
+
+
+def standin_response(system_prompt: str, topic: str) -> str:
+    title = _prompt_limit(system_prompt, r"SEO_TITLE:?\s*(?:maksimal|maks)\.?\s*(\d+)\s*karakter")
+    meta = _prompt_limit(system_prompt, r"META_DESCRIPTION:?\s*(?:maksimal|maks)\.?\s*(\d+)\s*karakter")
+    words = _prompt_limit(system_prompt, r"CONTENT_SNIPPET:?\s*(\d+)\s*[–-]\s*(\d+)\s*kata")
+
+    text = sample_response(
+        topic, sum(words) // 2 if words else UNBOUNDED_SNIPPET_WORDS
+    )
+    lines = text.splitlines()
+    lines[0] = "SEO_TITLE: " + _fit(topic.title() + TITLE_TAIL, title and title[0])
+    lines[1] = "META_DESCRIPTION: " + _fit(topic.capitalize() + META_TAIL, meta and meta[0])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,86 @@
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic_cache import SemanticCache  # noqa: E402
+
+PREFIXES = ["jasa", "produk", "toko", "layanan", "bisnis", "agency"]
+SUBJECTS = [
+    "renovasi rumah", "skincare anti aging", "pembuatan website", "travel umroh",
+    "katering sehat", "konstruksi gudang", "laundry kiloan", "fotografi produk",
+    "desain interior", "kursus bahasa", "sewa mobil", "kue ulang tahun",
+]
+MODIFIERS = ["", "murah", "terpercaya", "profesional", "terdekat", "premium",
+             "jakarta", "bandung", "surabaya", "online", "umkm", "berkualitas"]
+
+# (prompt tersimpan, variasi yang diharapkan hit, variasi yang harus miss)
+PARAPHRASES = [
+    ("jasa renovasi rumah", "jasa renov rumah", "jasa renovasi kantor"),
+    ("jasa renovasi rumah", "Jasa Renovasi Rumah!", "jasa renovasi dapur"),
+    ("produk skincare anti aging", "produk skincare antiaging", "produk skincare remaja"),
+    ("jasa pembuatan website", "jasa pembuatan web site", "jasa pembuatan aplikasi"),
+    ("travel umroh terpercaya", "travel umroh yg terpercaya", "travel haji plus"),
+]
+
+# pasangan skor n-gram tinggi (>0.8) yang tetap beda topik: harus miss
+NEAR_MISSES = [
+    ("jasa renovasi rumah murah", "jasa renovasi rumah mewah"),
+    ("produk skincare anti aging untuk pria", "produk skincare anti aging untuk wanita"),
+    ("jasa renovasi rumah minimalis jakarta", "jasa renovasi rumah minimalis bandung"),
+    ("sewa mobil jakarta", "sewa mobil jakarta utara"),
+    ("kursus bahasa inggris", "kursus bahasa jepang"),
+]
+
+
+def synthetic_prompts(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [
+        " ".join(filter(None, [
+            rng.choice(PREFIXES), rng.choice(SUBJECTS),
+            rng.choice(MODIFIERS), rng.choice(MODIFIERS), str(i),
+        ]))
+        for i in range(n)
+    ]
+
+
+def bench(size: int, threshold: float, queries: int = 500):
+    cache = SemanticCache(threshold=threshold,
+                          max_entries=size + len(PARAPHRASES) + len(NEAR_MISSES))
+    for prompt in synthetic_prompts(size):
+        cache.set(prompt, "x")
+    for stored, _, _ in PARAPHRASES:
+        cache.set(stored, stored)
+    for stored, _ in NEAR_MISSES:
+        cache.set(stored, stored)
+
+    timings = []
+    for prompt in synthetic_prompts(queries, seed=99):
+        started = time.perf_counter()
+        cache.get(prompt)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    true_hits = sum(cache.get(q) == s for s, q, _ in PARAPHRASES)
+    must_miss = [(s, q) for s, _, q in PARAPHRASES] + NEAR_MISSES
+    false_hits = sum(cache.get(q) is not None for _, q in must_miss)
+
+    print(
+        f"index {size:>6} | p50 {timings[len(timings) // 2] * 1000:6.2f} ms "
+        f"| p95 {timings[int(len(timings) * 0.95)] * 1000:6.2f} ms "
+        f"| parafrase hit {true_hits}/{len(PARAPHRASES)} "
+        f"| salah hit {false_hits}/{len(must_miss)}"
+    )
+
+
+def main():
+    threshold = float(os.getenv("LLM_SEMANTIC_THRESHOLD", 0.85))
+    print(f"threshold {threshold}")
+    for size in (1000, 5000, 20000):
+        bench(size, threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import llm; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def measure_import(runs: int = 5) -> list:
+    # proses baru setiap kali supaya tidak ada modul yang sudah ter-cache
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        timings.append(float(out.stdout.strip()))
+    return timings
+
+
+def main():
+    timings = measure_import()
+    print(f"import llm          : min {min(timings) * 1000:.0f} ms, "
+          f"max {max(timings) * 1000:.0f} ms")
+
+    import llm
+
+    started = time.perf_counter()
+    llm.get_llm()
+    print(f"get_llm() pertama   : {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    started = time.perf_counter()
+    llm.warm_up(background=False)
+    print(f"warm_up()           : {(time.perf_counter() - started) * 1000:.0f} ms")
+
+    started = time.perf_counter()
+    stream = llm.stream_marketing_content("jasa renovasi rumah",
+                                          bypass_cache=True)
+    next(stream)
+    print(f"first token         : {(time.perf_counter() - started) * 1000:.0f} ms")
+    stream.close()
+
+
+if __name__ == "__main__":
+    if not os.getenv("GROQ_API_KEY"):
+        sys.exit("GROQ_API_KEY diperlukan untuk mengukur first-token latency.")
+    main()
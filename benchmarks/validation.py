@@ -0,0 +1,62 @@
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from validation import ALLOWED_KEYWORDS, ContextValidator  # noqa: E402
+
+PROMPTS = [
+    "jasa renovasi rumah",
+    "produk skincare anti aging",
+    "halo apa kabar hari ini",
+    "select * from users",
+    "travel umroh terpercaya murah",
+    "cara membuat kue bolu yang enak sekali",
+]
+
+
+def synthetic_terms(n: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))
+        for _ in range(n)
+    ]
+
+
+def naive_is_valid(prompt: str, terms: list) -> bool:
+    # pendekatan lama: scan substring satu per satu
+    prompt = prompt.lower().strip()
+    if len(prompt) > 80:
+        return False
+    forbidden = ["import ", "def ", "{", "}", "<", ">", "http", "www", "pip install", "select "]
+    if any(p in prompt for p in forbidden):
+        return False
+    return any(t in prompt for t in terms)
+
+
+def per_call_us(fn, repeat: int = 2000) -> float:
+    started = time.perf_counter()
+    for i in range(repeat):
+        fn(PROMPTS[i % len(PROMPTS)])
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    print(f"{'istilah':>8} | {'compile':>9} | {'trie regex':>10} | {'scan lama':>10}")
+    for size in (len(ALLOWED_KEYWORDS), 1000, 5000, 20000):
+        terms = ALLOWED_KEYWORDS + synthetic_terms(size - len(ALLOWED_KEYWORDS))
+
+        started = time.perf_counter()
+        validator = ContextValidator(terms)
+        compile_ms = (time.perf_counter() - started) * 1000
+
+        fast = per_call_us(validator.is_valid)
+        slow = per_call_us(lambda p: naive_is_valid(p, terms), repeat=200)
+        print(f"{size:>8} | {compile_ms:>7.0f}ms | {fast:>8.1f}us | {slow:>8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from dataclasses import fields
+
+from formatter import MarketingSections, parse_marketing_response
+from memory import is_generated
+from storage import MESSAGES_FILE, AppendLog, StoreRegistry
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # opsional: tanpa pyarrow ekspor Parquet tidak tersedia
+    pa = pq = None
+
+# satu kolom per section, urutan sama dengan output model
+SECTION_COLUMNS = [f.name for f in fields(MarketingSections)]
+COLUMNS = ["tenant", "topic"] + SECTION_COLUMNS
+
+# baris per row group Parquet (memori ekspor dibatasi sebesar ini)
+PARQUET_BATCH = 1000
+
+FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def available_formats() -> list:
+    return [fmt for fmt in FORMATS if fmt != "parquet" or pq is not None]
+
+
+def iter_packs(log: AppendLog, tenant: str = None):
+    # scan log pesan baris per baris; topik = prompt user terakhir sebelum jawaban
+    topic = None
+    for _, message in log.scan():
+        if message.get("role") == "user":
+            topic = message.get("content")
+            continue
+        if not is_generated(message):
+            continue
+
+        if message.get("sections") is not None:
+            sections = MarketingSections.from_dict(message["sections"])
+        else:
+            # pesan lama tanpa "sections" diparse dari teks mentahnya
+            sections = parse_marketing_response(message.get("content") or "")
+
+        row = {"tenant": tenant, "topic": topic}
+        row.update({name: getattr(sections, name) for name in SECTION_COLUMNS})
+        yield row
+
+
+def iter_all_packs(registry: StoreRegistry):
+    # log dibaca langsung tanpa membuka ChatStore (tanpa membangun index)
+    for tenant in registry.tenant_ids():
+        log = AppendLog(os.path.join(registry.tenant_dir(tenant), MESSAGES_FILE))
+        yield from iter_packs(log, tenant)
+
+
+def write_csv(rows, out) -> int:
+    writer = csv.DictWriter(out, fieldnames=COLUMNS)
+    writer.writeheader()
+    written = 0
+    for row in rows:
+        writer.writerow(row)
+        written += 1
+    return written
+
+
+def write_jsonl(rows, out) -> int:
+    written = 0
+    for row in rows:
+        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        written += 1
+    return written
+
+
+def write_parquet(rows, out, batch_size: int = PARQUET_BATCH) -> int:
+    if pq is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+
+    schema = pa.schema([(name, pa.string()) for name in COLUMNS])
+    written = 0
+    batch = []
+    with pq.ParquetWriter(out, schema) as writer:
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                written += len(batch)
+                batch = []
+        if batch or not written:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            written += len(batch)
+    return written
+
+
+def export_packs(rows, fmt: str, out) -> int:
+    # out: file teks untuk csv/jsonl, file biner (atau path) untuk parquet
+    if fmt == "csv":
+        return write_csv(rows, out)
+    if fmt == "jsonl":
+        return write_jsonl(rows, out)
+    if fmt == "parquet":
+        return write_parquet(rows, out)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Ekspor SEO pack tersimpan ke CSV, JSONL, atau Parquet."
+    )
+    parser.add_argument("-f", "--format", choices=list(FORMATS), default="csv")
+    parser.add_argument("-o", "--output", help="file hasil (default: stdout untuk csv/jsonl)")
+    parser.add_argument("--tenant", help="hanya satu tenant (nilai ?sid=...); default semua")
+    args = parser.parse_args(argv)
+
+    registry = StoreRegistry()
+    if args.tenant:
+        rows = iter_packs(registry.get(args.tenant).messages, args.tenant)
+    else:
+        rows = iter_all_packs(registry)
+
+    if args.format == "parquet":
+        if not args.output:
+            parser.error("--output wajib untuk format parquet")
+        written = export_packs(rows, "parquet", args.output)
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            written = export_packs(rows, args.format, out)
+    else:
+        written = export_packs(rows, args.format, sys.stdout)
+
+    print(f"{written} SEO pack diekspor", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import re
+from dataclasses import dataclass, fields
+
+from telemetry import span
+
+SECTIONS = [
+    "SEO_TITLE",
+    "META_DESCRIPTION",
+    "FOCUS_KEYWORD",
+    "SECONDARY_KEYWORDS",
+    "HASHTAGS",
+    "CTA",
+    "CONTENT_SNIPPET",
+]
+
+# satu regex untuk semua header section, teks cukup di-scan sekali
+SECTION_PATTERN = re.compile("(" + "|".join(SECTIONS) + "):")
+
+
+@dataclass
+class MarketingSections:
+    seo_title: str = None
+    meta_description: str = None
+    focus_keyword: str = None
+    secondary_keywords: str = None
+    hashtags: str = None
+    cta: str = None
+    content_snippet: str = None
+
+    def get(self, section: str):
+        return getattr(self, section.lower())
+
+    def to_dict(self) -> dict:
+        return {
+            f.name.upper(): getattr(self, f.name)
+            for f in fields(self)
+            if getattr(self, f.name) is not None
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MarketingSections":
+        return cls(**{key.lower(): value for key, value in data.items()})
+
+    def to_text(self) -> str:
+        # format teks yang sama dengan output model (bisa diparse ulang)
+        return "\n".join(f"{section}: {value}" for section, value in self.to_dict().items())
+
+
+def parse_marketing_response(text: str) -> MarketingSections:
+    text = text.replace("**", "")
+
+    found = {}
+    matches = list(SECTION_PATTERN.finditer(text))
+    for match, following in zip(matches, matches[1:] + [None]):
+        name = match.group(1).lower()
+        if name in found:
+            continue
+        end = following.start() if following else len(text)
+        found[name] = text[match.end():end].strip()
+
+    return MarketingSections(**found)
+
+
+def parse_sections(text: str) -> dict:
+    return parse_marketing_response(text).to_dict()
+
+
+# stylesheet & handler copy bersama: satu salinan per dokumen card,
+# section cukup memakai class (tanpa inline style / onclick per tombol)
+CARD_CSS = """
+.seo-card{background:linear-gradient(180deg,#1b1f33,#171a2b);border-radius:16px;padding:20px 22px;border:1px solid rgba(255,255,255,.04);box-shadow:0 4px 18px rgba(0,0,0,.28);font-family:Manrope,system-ui}
+.seo-section{margin-bottom:20px}
+.seo-head{display:flex;justify-content:space-between;align-items:center;margin-bottom:6px}
+.seo-label{font-size:12px;font-weight:600;letter-spacing:.4px;text-transform:uppercase;color:#facc15}
+.seo-copy{display:flex;align-items:center;gap:6px;padding:4px 10px;font-size:12px;font-weight:500;color:#e6e7eb;background:rgba(255,255,255,.04);border:1px solid rgba(255,255,255,.08);border-radius:999px;cursor:pointer;transition:background .2s ease,border-color .2s ease,transform .1s ease,box-shadow .1s ease}
+.seo-copy:hover{background:rgba(255,255,255,.12);border-color:rgba(255,255,255,.25)}
+.seo-copy:active{transform:scale(.96);box-shadow:0 2px 8px rgba(0,0,0,.25)}
+.seo-copy.copied{background:rgba(34,197,94,.25);border-color:rgba(34,197,94,.6)}
+.seo-body{font-size:14px;line-height:1.65;color:#e6e7eb}
+""".strip()
+
+CARD_JS = """
+document.addEventListener("click",function(e){var b=e.target.closest(".seo-copy");if(!b)return;var t=b.closest(".seo-section").querySelector(".seo-body").innerText;navigator.clipboard.writeText(t).then(function(){var o=b.innerHTML;b.innerHTML="✓ Copied";b.classList.add("copied");setTimeout(function(){b.innerHTML=o;b.classList.remove("copied")},1500)})});
+""".strip()
+
+SECTION_TEMPLATE = (
+    '<div class="seo-section"><div class="seo-head">'
+    '<div class="seo-label">{title}</div>'
+    '<button class="seo-copy">⧉ Copy</button>'
+    '</div><div class="seo-body">{content}</div></div>'
+)
+
+
+def format_marketing_response(text: str, sections: "MarketingSections" = None) -> str:
+    with span("format"):
+        if sections is None:
+            sections = parse_marketing_response(text)
+
+        blocks = []
+        for section in SECTIONS:
+            content = sections.get(section)
+            if content is not None:
+                title = section.replace("_", " ").title()
+                blocks.append(SECTION_TEMPLATE.format(title=title, content=content))
+
+        return (
+            f"<style>{CARD_CSS}</style>"
+            f'<div class="seo-card">{"".join(blocks)}</div>'
+            f"<script>{CARD_JS}</script>"
+        )
@@ -0,0 +1,362 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from formatter import MarketingSections, parse_marketing_response
+from resilience import LLMUnavailableError
+from telemetry import count, profiled, span
+
+# worker generate di latar belakang (thread: pekerjaan didominasi I/O ke LLM)
+JOB_WORKERS = int(os.getenv("LLM_JOB_WORKERS", 4))
+
+# antrean job; ":memory:" untuk antrean in-process tanpa file
+JOB_DB_PATH = os.getenv("LLM_JOB_DB", "llm_jobs.sqlite3")
+
+# jeda minimal antar pembaruan teks parsial (detik)
+PROGRESS_INTERVAL = 0.25
+
+# jeda sebelum mencoba lagi jika database antrean sedang terkunci (detik)
+CLAIM_RETRY = 1.0
+FINISH_ATTEMPTS = 5
+
+# lease job yang sedang berjalan (detik); diperpanjang heartbeat, job dengan
+# lease habis (proses pemilik mati) diambil alih worker lain
+JOB_LEASE = 60.0
+
+# worker juga memeriksa antrean secara berkala (lease proses lain yang habis)
+CLAIM_POLL_INTERVAL = 1.0
+CLAIM_CANDIDATES = 8
+
+# job yang sudah selesai dibersihkan setelah sekian detik
+JOB_RETENTION = 86400
+
+LLM_UNAVAILABLE_RESPONSE = """
+Layanan AI sedang sibuk atau tidak dapat dihubungi.
+Silakan kirim ulang topik Anda dalam beberapa saat.
+"""
+
+
+def generate_turn(prompt: str, history: list = None, bypass_cache: bool = False,
+                  want_variants: bool = False, on_progress=None) -> dict:
+    # satu giliran chat → pesan assistant siap simpan
+    from llm import generate_marketing_variants, stream_marketing_content
+
+    chunks = []
+    sections = None
+    last_progress = 0.0
+
+    # variasi judul/meta/CTA dimulai paralel begitu field pendek selesai
+    # di-stream, sehingga hampir tidak menambah waktu tunggu
+    variant_pool = ThreadPoolExecutor(max_workers=1) if want_variants else None
+    variant_future = None
+    try:
+        for chunk in stream_marketing_content(
+            prompt, bypass_cache=bypass_cache, history=history
+        ):
+            # item terakhir: sections final (batas karakter sudah dicek)
+            if isinstance(chunk, MarketingSections):
+                sections = chunk
+                continue
+
+            chunks.append(chunk)
+            now = time.monotonic()
+            if now - last_progress < PROGRESS_INTERVAL:
+                continue
+            last_progress = now
+
+            partial = "".join(chunks)
+            if on_progress is not None:
+                on_progress(partial)
+
+            if variant_pool and variant_future is None and "CONTENT_SNIPPET:" in partial:
+                variant_future = variant_pool.submit(
+                    generate_marketing_variants, prompt,
+                    parse_marketing_response(partial)
+                )
+    except LLMUnavailableError:
+        if variant_pool:
+            variant_pool.shutdown(wait=False)
+        # upstream throttle / down: simpan pesan error, giliran tidak hilang
+        return {
+            "role": "assistant",
+            "type": "error",
+            "content": LLM_UNAVAILABLE_RESPONSE
+        }
+
+    response = "".join(chunks)
+    if sections is None:
+        sections = parse_marketing_response(response)
+    elif sections != parse_marketing_response(response):
+        # ada field yang diperbaiki setelah stream selesai
+        response = sections.to_text()
+
+    message = {
+        "role": "assistant",
+        "content": response,
+        "sections": sections.to_dict()
+    }
+
+    if variant_pool:
+        try:
+            if variant_future is None:
+                variant_future = variant_pool.submit(
+                    generate_marketing_variants, prompt, sections
+                )
+            variants = variant_future.result()
+        except Exception:
+            # variasi opsional: kegagalan tidak boleh menghilangkan hasil utama
+            variants = None
+        variant_pool.shutdown(wait=False)
+        if variants:
+            message["variants"] = variants
+    return message
+
+
+class JobQueue:
+    def __init__(self, registry, path: str = JOB_DB_PATH, workers: int = JOB_WORKERS,
+                 handler=generate_turn):
+        self.registry = registry
+        self.handler = handler
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        # teks parsial job yang sedang berjalan (hanya di memori)
+        self._progress = {}
+        # job yang sedang dikerjakan worker proses ini (lease-nya diperpanjang)
+        self._active = set()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                tenant TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                params TEXT NOT NULL,
+                status TEXT NOT NULL,
+                result TEXT,
+                created_at REAL NOT NULL,
+                finished_at REAL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, created_at)"
+        )
+        # antrean lama (sebelum ada lease) ditambah kolom pemilik & batas lease
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if column not in columns:
+                try:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+                except sqlite3.OperationalError:
+                    # proses lain sedang memigrasi file antrean yang sama
+                    pass
+        self._conn.commit()
+
+        # file antrean bisa dipakai beberapa proses: setiap proses punya ID
+        # sendiri dan hanya mengerjakan job yang di-submit-nya (teks parsial &
+        # index ChatStore tenant hanya ada di proses itu); job proses lain
+        # hanya diambil alih jika lease pemiliknya sudah habis
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"llm-job-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        self._workers.append(
+            threading.Thread(target=self._heartbeat, name="llm-job-lease", daemon=True)
+        )
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, tenant: str, prompt: str, **params) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._wake:
+            self._conn.execute(
+                "INSERT INTO jobs (id, tenant, prompt, params, status, created_at, "
+                "owner, lease_until) VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, tenant, prompt, json.dumps(params, ensure_ascii=False), now,
+                 self.owner, now + JOB_LEASE)
+            )
+            self._conn.execute(
+                "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (now - JOB_RETENTION,)
+            )
+            self._conn.commit()
+            self._wake.notify()
+        count("jobs", status="queued")
+        return job_id
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, result FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        status, result = row
+        return {
+            "id": job_id,
+            "status": status,
+            "result": json.loads(result) if result else None,
+            "progress": self._progress.get(job_id),
+        }
+
+    def pending(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()[0]
+
+    def _claim(self):
+        # ambil job terlama yang antre dari proses ini (atau job proses lain
+        # yang lease-nya habis karena prosesnya mati); tunggu jika kosong
+        claimable = (
+            "(status = 'queued' AND (owner = ? OR owner IS NULL OR lease_until < ?)) "
+            "OR (status = 'running' AND (lease_until IS NULL OR lease_until < ?))"
+        )
+        with self._wake:
+            while True:
+                now = time.time()
+                rows = self._conn.execute(
+                    f"SELECT id, tenant, prompt, params FROM jobs WHERE {claimable} "
+                    "ORDER BY created_at LIMIT ?",
+                    (self.owner, now, now, CLAIM_CANDIDATES)
+                ).fetchall()
+                for row in rows:
+                    # UPDATE bersyarat = klaim atomik antar proses: hanya satu
+                    # yang mendapat rowcount 1
+                    claimed = self._conn.execute(
+                        "UPDATE jobs SET status = 'running', owner = ?, lease_until = ? "
+                        f"WHERE id = ? AND ({claimable})",
+                        (self.owner, now + JOB_LEASE, row[0], self.owner, now, now)
+                    ).rowcount
+                    self._conn.commit()
+                    if claimed:
+                        return row
+                # lease proses lain yang habis tidak membangunkan Condition: polling juga
+                self._wake.wait(CLAIM_POLL_INTERVAL)
+
+    def _heartbeat(self):
+        # perpanjang lease job antrean proses ini dan job yang benar-benar
+        # sedang dikerjakan worker hidup; job yang ditinggal worker mati bisa
+        # diambil alih
+        while True:
+            time.sleep(JOB_LEASE / 3)
+            try:
+                with self._lock:
+                    active = list(self._active)
+                    self._conn.execute(
+                        f"UPDATE jobs SET lease_until = ? WHERE owner = ? AND "
+                        f"(status = 'queued' OR id IN ({','.join('?' * len(active))}))",
+                        [time.time() + JOB_LEASE, self.owner] + active
+                    )
+                    self._conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def _work(self):
+        # apa pun yang gagal, worker tetap hidup dan job selalu ditandai selesai
+        while True:
+            try:
+                job = self._claim()
+            except sqlite3.Error:
+                # database sibuk/terkunci sesaat: coba lagi nanti
+                time.sleep(CLAIM_RETRY)
+                continue
+            try:
+                self._run(*job)
+            except Exception:
+                pass
+
+    def _run(self, job_id: str, tenant: str, prompt: str, params: str):
+        def on_progress(text):
+            self._progress[job_id] = text
+
+        with self._lock:
+            self._active.add(job_id)
+        message = {
+            "role": "assistant",
+            "type": "error",
+            "content": LLM_UNAVAILABLE_RESPONSE
+        }
+        status = "error"
+        try:
+            # satu giliran = satu span (generate, parse, simpan); LLM_PROFILE
+            # menyimpan profil per giliran dari thread worker yang mengerjakannya
+            with span("turn") as attrs, profiled("turn"):
+                try:
+                    message = self.handler(
+                        prompt, on_progress=on_progress, **json.loads(params)
+                    )
+                    status = "done"
+                except Exception as exc:
+                    attrs["error"] = type(exc).__name__
+
+                if not self._owns(job_id):
+                    # lease diambil proses lain (heartbeat terlambat): jangan
+                    # menyimpan pesan kembar, proses itu yang menyelesaikan job
+                    status = attrs["status"] = "lost"
+                    return
+
+                # hasil disimpan ke store tenant dulu, baru job ditandai selesai,
+                # jadi UI yang membaca status "done" pasti menemukan pesannya
+                try:
+                    self.registry.get(tenant).append_message(message)
+                except Exception as exc:
+                    # gagal tulis (disk penuh, lock): hasil tetap dikirim ke UI lewat job
+                    status = "error"
+                    attrs["error"] = type(exc).__name__
+                attrs["status"] = status
+        except Exception:
+            # span/profiler gagal di luar handler: status terakhir tetap
+            # dicatat di bawah supaya job tidak menggantung "running"
+            count("job_failures")
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+            if status == "lost":
+                self._progress.pop(job_id, None)
+            else:
+                self._finish(job_id, status, message)
+
+    def _owns(self, job_id: str) -> bool:
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT owner FROM jobs WHERE id = ?", (job_id,)
+                ).fetchone()
+        except sqlite3.Error:
+            return True
+        return row is not None and row[0] == self.owner
+
+    def _finish(self, job_id: str, status: str, message: dict):
+        # status akhir wajib tercatat (UI mengunci input selama job berjalan),
+        # jadi kegagalan sesaat SQLite dicoba ulang beberapa kali
+        result = json.dumps(message, ensure_ascii=False)
+        for attempt in range(FINISH_ATTEMPTS):
+            try:
+                with self._lock:
+                    try:
+                        # hanya pemilik lease yang boleh menutup job
+                        self._conn.execute(
+                            "UPDATE jobs SET status = ?, result = ?, finished_at = ? "
+                            "WHERE id = ? AND owner = ?",
+                            (status, result, time.time(), job_id, self.owner)
+                        )
+                        self._conn.commit()
+                    except sqlite3.Error:
+                        self._conn.rollback()
+                        raise
+                break
+            except sqlite3.Error:
+                time.sleep(CLAIM_RETRY)
+
+        self._progress.pop(job_id, None)
+        count("jobs", status=status)
@@ -1,77 +1,444 @@
 import os
-from langchain_groq import ChatGroq
-from langchain_core.messages import SystemMessage, HumanMessage
+import asyncio
+import hashlib
+import threading
+import time
+from dataclasses import replace
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
 
-if not os.getenv("GROQ_API_KEY"):
-    raise EnvironmentError(
-        "GROQ_API_KEY not found in environment variables."
-    )
-
-llm = ChatGroq(
-    model="meta-llama/llama-4-scout-17b-16e-instruct",
-    temperature=0
+from cache import create_cache
+from formatter import MarketingSections, parse_marketing_response
+from memory import build_context, count_message_tokens
+from prompts import PROMPT_VERSION, get_system_prompt, prompt_hash
+from resilience import create_caller
+from router import create_router, served_by
+from schema import build_repair_messages, clip_to_limits, find_violations, repair_model
+from semantic_cache import create_semantic_cache
+from telemetry import count, observe, span
+from usage import create_usage_tracker
+from validation import normalize_text
+from variants import (
+    CANDIDATE_EXTRA, VARIANT_COUNT, VARIANT_TEMPERATURE, VariantSet,
+    build_variant_messages, rank_variants
 )
 
-SYSTEM_PROMPT = SystemMessage(content="""
-Anda adalah Senior Digital Marketing Strategist, Spesialis SEO, dan Brand Copywriter
-dengan pengalaman nyata lebih dari 10 tahun di agensi dan tim in-house.
-
-Seluruh output HARUS terdengar seperti ditulis oleh profesional manusia berpengalaman,
-bukan AI, bukan generator konten, dan bukan sistem berbasis template.
-
-POLA PIKIR INTI:
-- Berpikir seperti strategist yang menulis dari pengalaman nyata, bukan dari pola
-- Menulis alami, kontekstual, dan terasa manusiawi (tidak terlalu rapi atau kaku)
-- Mengutamakan kejelasan, daya persuasi, dan kredibilitas dibandingkan kepanjangan
-- Anggap konten ini akan direview oleh marketer senior dan klien korporat
-
-ATURAN ANTI-AI (WAJIB):
-- Hindari frasa khas AI atau marketing generik (contoh: “solusi terbaik”, “meningkatkan”, “maksimalkan”, “temukan”)
-- Hindari struktur kalimat simetris dan ritme yang berulang
-- Hindari transisi yang terlalu halus, formal, atau terdengar otomatis
-- JANGAN terdengar seperti blog SEO, tools marketing, atau template konten
-- Gunakan bahasa yang terasa ditulis, bukan dihasilkan
-
-ATURAN ANTI-PLAGIARISME:
-- JANGAN memparafrase atau meniru konten yang umum di internet
-- JANGAN menggunakan formula headline atau gaya pemasaran klise
-- Bangun ide dari pemikiran dasar dan sudut pandang orisinal
-- Gunakan diksi yang tidak pasaran dan tone brand yang realistis
-
-ATURAN SEO & KUALITAS KONTEN:
-- Integrasikan keyword secara natural, jangan dipaksakan
-- Selaraskan dengan search intent nyata (informatif, komersial, atau transaksional)
-- Fokus pada diferensiasi, bukan penjejalan keyword
-- Tulis seolah ini mewakili reputasi brand yang sungguh ada
-
-FORMAT OUTPUT WAJIB (TIDAK BOLEH DIUBAH):
-
-SEO_TITLE:
-META_DESCRIPTION:
-FOCUS_KEYWORD:
-SECONDARY_KEYWORDS:
-HASHTAGS:
-CTA:
-CONTENT_SNIPPET:
-
-BATASAN KERAS:
-- SEO_TITLE: maksimal 60 karakter
-- META_DESCRIPTION: maksimal 155 karakter
-- CONTENT_SNIPPET: 380–420 kata (sekitar 400 kata)
-- CONTENT_SNIPPET harus berupa paragraf utuh, bukan bullet point
-- CONTENT_SNIPPET adalah isi konten utama, bukan teaser atau ringkasan
-- Tone persuasif, profesional, dan berorientasi bisnis
-- JANGAN mengajukan pertanyaan dalam bentuk apa pun
-- JANGAN menjelaskan proses berpikir
-- JANGAN menyebut AI, model, plagiarisme, atau sumber apa pun
-""")
-
-
-def generate_marketing_content(user_prompt: str) -> str:
-    messages = [
-        SYSTEM_PROMPT,
+MODEL_NAME = "meta-llama/llama-4-scout-17b-16e-instruct"
+TEMPERATURE = 0
+
+# perkiraan token output satu SEO pack, dipakai untuk rate limit token/menit
+EXPECTED_OUTPUT_TOKENS = 900
+
+# perkiraan token output perbaikan satu field pendek (judul, meta, CTA, ...)
+REPAIR_FIELD_TOKENS = 80
+
+# jumlah panggilan perbaikan parsial sebelum field dipotong paksa
+REPAIR_ATTEMPTS = int(os.getenv("LLM_REPAIR_ATTEMPTS", 1))
+
+caller = create_caller()
+
+# pool backend (default: satu ChatGroq dengan MODEL_NAME); client tiap backend
+# dibuat sekali per proses, koneksi HTTP ikut bertahan lintas rerun Streamlit;
+# request tambahan router (hedge/fallback) ikut dihitung batas RPM/TPM caller
+router = create_router(f"groq:{MODEL_NAME}", TEMPERATURE, admit=caller.admit_extra)
+
+
+def get_llm():
+    # client backend utama (urutan konfigurasi)
+    return router.backends[0].client()
+
+
+def warm_up(background: bool = True):
+    # buka connection pool lebih awal lewat request ringan (daftar model),
+    # kegagalan di sini tidak boleh mengganggu aplikasi
+    if background:
+        threading.Thread(target=router.warm_up, name="llm-warm-up", daemon=True).start()
+    else:
+        router.warm_up()
+
+
+SYSTEM_PROMPT = get_system_prompt()
+
+# batas request async yang boleh berjalan bersamaan ke Groq (per proses)
+MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", 4))
+
+
+def cache_namespace(prompt_version: str = None) -> str:
+    # hasil hanya boleh dipakai ulang untuk prompt sistem, model & suhu yang sama
+    return "\x1f".join([prompt_hash(prompt_version), router.signature(), str(TEMPERATURE)])
+
+
+response_cache = create_cache()
+semantic_cache = create_semantic_cache()
+usage_tracker = create_usage_tracker()
+
+
+def cache_key(user_prompt: str, prompt_version: str = None) -> str:
+    raw = "\x1f".join([normalize_text(user_prompt), cache_namespace(prompt_version)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def lookup_cache(user_prompt: str, bypass_cache: bool = False,
+                 prompt_version: str = None):
+    if bypass_cache:
+        count("cache_lookups", result="bypass")
+        return None
+
+    with span("cache.lookup") as attrs:
+        # exact match dulu, baru prompt yang mirip (semantic)
+        attrs["result"] = "miss"
+        cached = None
+        if response_cache is not None:
+            cached = response_cache.get(cache_key(user_prompt, prompt_version))
+            if cached is not None:
+                attrs["result"] = "exact"
+
+        if cached is None and semantic_cache is not None:
+            cached = semantic_cache.get(
+                normalize_text(user_prompt), cache_namespace(prompt_version)
+            )
+            if cached is not None:
+                attrs["result"] = "semantic"
+
+    count("cache_lookups", result=attrs["result"])
+    return cached
+
+
+def store_cache(user_prompt: str, content: str, prompt_version: str = None):
+    if response_cache is not None:
+        response_cache.set(cache_key(user_prompt, prompt_version), content)
+
+    if semantic_cache is not None:
+        semantic_cache.set(
+            normalize_text(user_prompt), content, cache_namespace(prompt_version)
+        )
+
+
+def record_usage(mode: str, usage: dict = None, seconds: float = None,
+                 first_token_seconds: float = None, prompt_version: str = None,
+                 model: str = None):
+    prompt_version = prompt_version or PROMPT_VERSION
+    # backend yang benar-benar menjawab (bisa hasil hedging/fallback router)
+    model = model or served_by() or MODEL_NAME
+    usage = usage or {}
+    count("llm_tokens", usage.get("input_tokens", 0),
+          direction="input", prompt_version=prompt_version)
+    count("llm_tokens", usage.get("output_tokens", 0),
+          direction="output", prompt_version=prompt_version)
+    observe("llm.first_token", first_token_seconds, mode=mode)
+
+    if usage_tracker is not None:
+        usage_tracker.record(
+            prompt_version, model, mode,
+            usage=usage, seconds=seconds,
+            first_token_seconds=first_token_seconds
+        )
+
+
+def usage_stats() -> dict:
+    return usage_tracker.summary() if usage_tracker is not None else {}
+
+
+def estimate_tokens(messages: list) -> int:
+    return count_message_tokens(messages) + EXPECTED_OUTPUT_TOKENS
+
+
+def resilience_stats() -> dict:
+    return {**caller.metrics, "circuit": caller.breaker.state}
+
+
+def router_stats() -> dict:
+    return router.stats()
+
+
+def cache_stats() -> dict:
+    if response_cache is None:
+        stats = {"hits": 0, "misses": 0, "hit_rate": 0.0, "size": 0}
+    else:
+        stats = response_cache.stats()
+
+    if semantic_cache is not None:
+        stats["semantic"] = semantic_cache.stats()
+    return stats
+
+
+def repair_sections(user_prompt: str, sections: MarketingSections,
+                    prompt_version: str = None) -> MarketingSections:
+    # hanya field yang melanggar yang diminta ulang (structured output kecil),
+    # bukan seluruh SEO pack ~900 token
+    for _ in range(REPAIR_ATTEMPTS):
+        violations = find_violations(sections)
+        if not violations:
+            return sections
+
+        messages = build_repair_messages(user_prompt, sections, violations)
+        expected = sum(
+            EXPECTED_OUTPUT_TOKENS if name == "content_snippet" else REPAIR_FIELD_TOKENS
+            for name in violations
+        )
+        output_model = repair_model(list(violations))
+
+        started = time.perf_counter()
+        try:
+            with span("llm.repair"):
+                result = caller.call(
+                    lambda: router.invoke(
+                        lambda llm: llm.with_structured_output(
+                            output_model, include_raw=True
+                        ).invoke(messages),
+                        kind="structured"
+                    ),
+                    count_message_tokens(messages) + expected
+                )
+        except Exception:
+            # perbaikan gagal tidak boleh menghilangkan hasil utama
+            break
+
+        record_usage("repair", result["raw"].usage_metadata,
+                     time.perf_counter() - started, prompt_version=prompt_version)
+        count("repairs", len(violations))
+
+        if result["parsed"] is not None:
+            fixed = {k: v for k, v in result["parsed"].model_dump().items() if v}
+            sections = replace(sections, **fixed)
+
+    return clip_to_limits(sections)
+
+
+def finalize_content(user_prompt: str, content: str,
+                     prompt_version: str = None) -> tuple:
+    # (teks final, sections): teks asli dipertahankan jika sudah valid
+    sections = parse_marketing_response(content)
+    if not find_violations(sections):
+        return content, sections
+
+    sections = repair_sections(user_prompt, sections, prompt_version)
+    return sections.to_text(), sections
+
+
+def build_messages(user_prompt: str, history: list = None,
+                   prompt_version: str = None) -> list:
+    # urutan tetap: prompt sistem (prefix stabil) → riwayat → input user
+    return [
+        get_system_prompt(prompt_version),
+        *build_context(history),
         HumanMessage(content=user_prompt)
     ]
 
-    response = llm.invoke(messages)
-    return response.content
\ No newline at end of file
+
+def generate_marketing_content(user_prompt: str, bypass_cache: bool = False,
+                               history: list = None, prompt_version: str = None) -> str:
+    with span("llm.generate", mode="invoke") as attrs:
+        messages = build_messages(user_prompt, history, prompt_version)
+
+        # jawaban yang bergantung pada riwayat percakapan tidak di-cache
+        cacheable = len(messages) == 2
+        cached = lookup_cache(user_prompt, bypass_cache or not cacheable, prompt_version)
+        attrs["cache"] = "miss" if cached is None else "hit"
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
+        with span("llm.call", mode="invoke"):
+            response = caller.call(
+                lambda: router.invoke(lambda llm: llm.invoke(messages)),
+                estimate_tokens(messages)
+            )
+        record_usage("invoke", response.usage_metadata, time.perf_counter() - started,
+                     prompt_version=prompt_version)
+
+        content, _ = finalize_content(user_prompt, response.content, prompt_version)
+        if cacheable:
+            store_cache(user_prompt, content, prompt_version)
+        return content
+
+
+def stream_marketing_content(user_prompt: str, bypass_cache: bool = False,
+                             history: list = None, prompt_version: str = None):
+    # yield potongan teks, lalu satu MarketingSections final yang sudah
+    # divalidasi (bisa berbeda dari teks stream jika ada field yang diperbaiki);
+    # durasi span mencakup waktu render di pemanggil di antara chunk
+    with span("llm.generate", mode="stream") as attrs:
+        messages = build_messages(user_prompt, history, prompt_version)
+
+        cacheable = len(messages) == 2
+        cached = lookup_cache(user_prompt, bypass_cache or not cacheable, prompt_version)
+        attrs["cache"] = "miss" if cached is None else "hit"
+        if cached is not None:
+            yield cached
+            yield parse_marketing_response(cached)
+            return
+
+        chunks = []
+        usage = None
+        first_token = None
+        started = time.perf_counter()
+        for chunk in caller.stream(
+            lambda: router.stream(lambda llm: llm.stream(messages)),
+            estimate_tokens(messages)
+        ):
+            # Groq mengirim usage token di chunk terakhir
+            if chunk.usage_metadata:
+                usage = chunk.usage_metadata
+            if chunk.content:
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                chunks.append(chunk.content)
+                yield chunk.content
+
+        record_usage("stream", usage, time.perf_counter() - started, first_token,
+                     prompt_version=prompt_version)
+
+        content, sections = finalize_content(user_prompt, "".join(chunks), prompt_version)
+
+        # hanya respons yang selesai penuh yang masuk cache
+        if cacheable:
+            store_cache(user_prompt, content, prompt_version)
+        yield sections
+
+
+def generate_marketing_variants(user_prompt: str, sections: MarketingSections = None,
+                                count: int = VARIANT_COUNT,
+                                prompt_version: str = None) -> list:
+    # satu panggilan structured untuk semua variasi judul/meta/CTA; snippet
+    # dari SEO pack utama dipakai ulang, jadi waktunya ≈ satu generate pendek
+    if sections is None:
+        content = generate_marketing_content(user_prompt, prompt_version=prompt_version)
+        sections = parse_marketing_response(content)
+
+    messages = build_variant_messages(user_prompt, sections, count + CANDIDATE_EXTRA)
+
+    def invoke_variants(llm):
+        structured = llm.model_copy(
+            update={"temperature": VARIANT_TEMPERATURE}
+        ).with_structured_output(VariantSet, include_raw=True)
+        return structured.invoke(messages)
+
+    started = time.perf_counter()
+    with span("llm.variants"):
+        result = caller.call(
+            lambda: router.invoke(invoke_variants, kind="structured"),
+            count_message_tokens(messages) + REPAIR_FIELD_TOKENS * 3 * count
+        )
+    record_usage("variants", result["raw"].usage_metadata,
+                 time.perf_counter() - started, prompt_version=prompt_version)
+
+    parsed = result["parsed"]
+    candidates = [v.model_dump() for v in parsed.variants] if parsed is not None else []
+    reference = {
+        "seo_title": sections.seo_title,
+        "meta_description": sections.meta_description,
+        "cta": sections.cta,
+    }
+    return rank_variants(candidates, sections.focus_keyword, reference, count)
+
+
+def generate_marketing_batch(user_prompts: list, max_concurrency: int = 4,
+                             bypass_cache: bool = False):
+    # yield (index, konten atau Exception, usage) sesuai urutan selesai
+    pending = []
+    for idx, user_prompt in enumerate(user_prompts):
+        cached = lookup_cache(user_prompt, bypass_cache)
+        if cached is not None:
+            yield idx, cached, {}
+        else:
+            pending.append(idx)
+
+    if not pending:
+        return
+
+    def invoke_batch(messages):
+        # usage dicatat di thread konsumen: nama backend ikut dikembalikan
+        response = caller.call(
+            lambda: router.invoke(lambda llm: llm.invoke(messages)),
+            estimate_tokens(messages)
+        )
+        return response, served_by()
+
+    guarded = RunnableLambda(invoke_batch)
+    results = guarded.batch_as_completed(
+        [build_messages(user_prompts[idx]) for idx in pending],
+        config={"max_concurrency": max_concurrency},
+        return_exceptions=True
+    )
+
+    for pos, result in results:
+        idx = pending[pos]
+        if isinstance(result, Exception):
+            yield idx, result, {}
+            continue
+
+        response, model = result
+        record_usage("batch", response.usage_metadata, model=model)
+        content, _ = finalize_content(user_prompts[idx], response.content)
+        store_cache(user_prompts[idx], content)
+        yield idx, content, response.usage_metadata or {}
+
+
+# =========================================================
+# ASYNC: satu event loop per proses, semaphore + coalescing
+# =========================================================
+_loop = None
+_loop_lock = threading.Lock()
+_semaphore = None
+_in_flight = {}
+
+
+def _get_loop():
+    global _loop, _semaphore
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="llm-async", daemon=True
+            ).start()
+            _semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+            _loop = loop
+    return _loop
+
+
+async def _acall(user_prompt: str) -> str:
+    async with _semaphore:
+        messages = build_messages(user_prompt)
+        started = time.perf_counter()
+        response = await caller.acall(
+            lambda: router.ainvoke(lambda llm: llm.ainvoke(messages)),
+            estimate_tokens(messages)
+        )
+        record_usage("async", response.usage_metadata, time.perf_counter() - started)
+
+    # perbaikan parsial memakai client sync, jangan blok event loop
+    content, _ = await asyncio.to_thread(finalize_content, user_prompt, response.content)
+    store_cache(user_prompt, content)
+    return content
+
+
+async def _agenerate(user_prompt: str, bypass_cache: bool) -> str:
+    cached = lookup_cache(user_prompt, bypass_cache)
+    if cached is not None:
+        return cached
+
+    # prompt identik yang sedang diproses cukup menunggu hasil yang sama
+    key = cache_key(user_prompt)
+    future = _in_flight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(_acall(user_prompt))
+        _in_flight[key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+
+    return await asyncio.shield(future)
+
+
+async def agenerate_marketing_content(user_prompt: str, bypass_cache: bool = False) -> str:
+    future = asyncio.run_coroutine_threadsafe(
+        _agenerate(user_prompt, bypass_cache), _get_loop()
+    )
+    return await asyncio.wrap_future(future)
+
+
+def generate_marketing_content_shared(user_prompt: str, bypass_cache: bool = False) -> str:
+    # versi blocking untuk thread biasa (mis. script Streamlit)
+    future = asyncio.run_coroutine_threadsafe(
+        _agenerate(user_prompt, bypass_cache), _get_loop()
+    )
+    return future.result()
@@ -1,52 +1,30 @@
+import io
 import os
+import tempfile
 import streamlit as st
 import streamlit.components.v1 as components
-import json
 
-HISTORY_FILE = "chat_history.json"
-MESSAGES_FILE = "chat_messages.json"
+from export import FORMATS, available_formats, export_packs, iter_packs
+from jobs import JobQueue
+from llm import cache_stats, warm_up
+from memory import is_generated, trim_messages
+from formatter import MarketingSections, format_marketing_response
+from storage import StoreRegistry
+from telemetry import span, start_metrics_server
+from variants import VARIANT_COUNT
+from validation import INVALID_CONTEXT_RESPONSE, is_follow_up, is_marketing_context
 
-def load_messages():
-    if os.path.exists(MESSAGES_FILE):
-        with open(MESSAGES_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
 
-def save_messages(messages):
-    with open(MESSAGES_FILE, "w", encoding="utf-8") as f:
-        json.dump(messages, f, ensure_ascii=False, indent=2)
+# Jeda polling status job generate (detik)
+JOB_POLL_INTERVAL = 0.5
 
+# Virtualisasi chat: jumlah pesan per halaman & card yang langsung di-mount
+MESSAGE_PAGE_SIZE = 20
+LIVE_CARDS = 3
+RENDER_CACHE_ENTRIES = 256
 
-def load_history():
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
-def save_history(history):
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, ensure_ascii=False, indent=2)
-
-
-# =========================================================
-# VALIDATION CONFIG
-# =========================================================
-ALLOWED_KEYWORDS = [
-    "jasa", "produk", "bisnis", "usaha", "brand",
-    "toko", "layanan", "service", "agency",
-    "marketing", "seo", "digital", "online",
-    "website", "aplikasi", "skincare", "makanan",
-    "travel", "tour", "konstruksi", "renovasi"
-]
-
-INVALID_CONTEXT_RESPONSE = """
-Input Anda belum sesuai dengan konteks **Search Engine Assistant**,
-Silakan masukkan topik **Produk, Jasa, atau Bisnis**.
-
-Contoh Inputan: Jasa renovasi rumah, Produk skincare anti aging, Jasa pembuatan website UMKM, Travel umroh terpercaya
-
-Gunakan kata benda atau frasa singkat (bukan pertanyaan).
-"""
+# Jumlah topik history per halaman di sidebar
+HISTORY_PAGE_SIZE = 20
 
 
 # =========================================================
@@ -58,6 +36,26 @@ st.set_page_config(
     layout="wide",
 )
 
+# =========================================================
+# STORAGE (registry per proses, satu store per session/user)
+# =========================================================
+@st.cache_resource(show_spinner=False)
+def get_registry():
+    return StoreRegistry()
+
+# ID tenant disimpan di URL (?sid=...) supaya tetap sama setelah reload;
+# session pertama setelah upgrade mendapat riwayat lama (tenant default)
+if "sid" not in st.query_params:
+    st.query_params["sid"] = get_registry().new_tenant_id()
+
+store = get_registry().get(st.query_params["sid"])
+
+# antrean generate + worker dibuat sekali per proses (bukan per session):
+# job tetap berjalan walau halaman di-rerun, pindah tab, atau di-reload
+@st.cache_resource(show_spinner=False)
+def get_jobs():
+    return JobQueue(get_registry())
+
 # =========================================================
 # API KEY INPUT – SCOPED STYLING (DIBIARKAN)
 # =========================================================
@@ -102,147 +100,49 @@ if "GROQ_API_KEY" not in os.environ:
     st.markdown('</div>', unsafe_allow_html=True)
     st.stop()
 
-from llm import generate_marketing_content
-
-def is_marketing_context(prompt: str) -> bool:
-    prompt = prompt.lower().strip()
-
-    if len(prompt) > 80:
-        return False
-
-    forbidden_patterns = [
-        "import ", "def ", "{", "}", "<", ">", 
-        "http", "www", "pip install", "SELECT "
-    ]
-    if any(p in prompt for p in forbidden_patterns):
-        return False
-
-    return any(keyword in prompt for keyword in ALLOWED_KEYWORDS)
-
-
-def format_marketing_response(text: str) -> str:
-    text = text.replace("**", "").strip()
-
-    sections = [
-        "SEO_TITLE",
-        "META_DESCRIPTION",
-        "FOCUS_KEYWORD",
-        "SECONDARY_KEYWORDS",
-        "HASHTAGS",
-        "CTA",
-        "CONTENT_SNIPPET",
-    ]
-
-    blocks = ""
-
-    for idx, section in enumerate(sections):
-        if f"{section}:" in text:
-            part = text.split(f"{section}:")[1]
-            for s in sections:
-                if s != section and f"{s}:" in part:
-                    part = part.split(f"{s}:")[0]
-
-            content = part.strip()
-            title = section.replace("_", " ").title()
-            element_id = f"copy-{idx}"
-
-            blocks += f"""
-            <div style="margin-bottom:20px;">
-                <div style="display:flex;justify-content:space-between;align-items:center;margin-bottom:6px;">
-                    <div style="
-                        font-size:12px;
-                        font-weight:600;
-                        letter-spacing:0.4px;
-                        text-transform:uppercase;
-                        color:#facc15;
-                    ">
-                        {title}
-                    </div>
-
-                 <button
-                    onclick="
-                        navigator.clipboard.writeText(
-                            document.getElementById('{element_id}').innerText
-                        ).then(() => {{
-                            const originalText = this.innerHTML;
-                            const originalBg = this.style.background;
-                            const originalBorder = this.style.borderColor;
-
-                            this.innerHTML = '✓ Copied';
-                            this.style.background = 'rgba(34,197,94,0.25)';
-                            this.style.borderColor = 'rgba(34,197,94,0.6)';
-
-                            setTimeout(() => {{
-                                this.innerHTML = originalText;
-                                this.style.background = originalBg;
-                                this.style.borderColor = originalBorder;
-                            }}, 1500);
-                        }});
-                                "
-                                style="
-                                    display:flex;
-                                    align-items:center;
-                                    gap:6px;
-                                    padding:4px 10px;
-                                    font-size:12px;
-                                    font-weight:500;
-                                    color:#e6e7eb;
-                                    background:rgba(255,255,255,0.04);
-                                    border:1px solid rgba(255,255,255,0.08);
-                                    border-radius:999px;
-                                    cursor:pointer;
-
-                                    transition:
-                                        background 0.2s ease,
-                                        border-color 0.2s ease,
-                                        transform 0.1s ease,
-                                        box-shadow 0.1s ease;
-                                "
-                                onmouseover="this.style.background='rgba(255,255,255,0.12)';
-                                            this.style.borderColor='rgba(255,255,255,0.25)'"
-                                onmouseout="this.style.background='rgba(255,255,255,0.04)';
-                                            this.style.borderColor='rgba(255,255,255,0.08)';
-                                            this.style.transform='scale(1)';
-                                            this.style.boxShadow='none'"
-                                onmousedown="this.style.transform='scale(0.96)';
-                                            this.style.boxShadow='0 2px 8px rgba(0,0,0,0.25)'"
-                                onmouseup="this.style.transform='scale(1)'"
-                            >
-                                ⧉ Copy
-                            </button>
-                        </div>
-                        <div id="{element_id}" style="
-                            font-size:14px;
-                            line-height:1.65;
-                            color:#e6e7eb;
-                        ">
-                            {content}
-                    </div>
-            </div>
-            """
-
-    return f"""
-    <div style="
-        background:linear-gradient(180deg,#1b1f33,#171a2b);
-        border-radius:16px;
-        padding:20px 22px;
-        border:1px solid rgba(255,255,255,0.04);
-        box-shadow:0 4px 18px rgba(0,0,0,0.28);
-        font-family:Manrope,system-ui;
-    ">
-        {blocks}
-    </div>
-    """
+# client LLM dibuat & dipanaskan sekali per proses
+@st.cache_resource(show_spinner=False)
+def warm_llm():
+    warm_up()
+
+warm_llm()
+
+# endpoint /metrics (Prometheus) dibuka sekali per proses jika METRICS_PORT di-set
+@st.cache_resource(show_spinner=False)
+def metrics_server():
+    return start_metrics_server()
+
+metrics_server()
 
 # =========================================================
 # SESSION STATE
 # =========================================================
 
-if "history" not in st.session_state:
-    st.session_state.history = load_history()
-
 if "messages" not in st.session_state:
-    st.session_state.messages = load_messages()
+    st.session_state.messages = trim_messages(store.load_messages())
+
+if "visible_messages" not in st.session_state:
+    st.session_state.visible_messages = MESSAGE_PAGE_SIZE
+
+if "expanded_cards" not in st.session_state:
+    st.session_state.expanded_cards = set()
+
+
+def reset_chat_view():
+    st.session_state.visible_messages = MESSAGE_PAGE_SIZE
+    st.session_state.expanded_cards = set()
+
+
+def add_message(msg: dict, persist: bool = True):
+    st.session_state.messages.append(msg)
+    if persist:
+        store.append_message(msg)
+
+    # jumlah pesan di session dibatasi; file tetap menyimpan riwayat lengkap
+    trimmed = trim_messages(st.session_state.messages)
+    if len(trimmed) != len(st.session_state.messages):
+        st.session_state.messages = trimmed
+        st.session_state.expanded_cards = set()
 
 has_interaction = len(st.session_state.messages) > 0
 
@@ -274,21 +174,6 @@ st.markdown(f"""
 <style>
 @import url('https://fonts.googleapis.com/css2?family=Manrope:wght@400;500;600;700&display=swap');
 
-            
-/* ===== HIDE STREAMLIT SIDEBAR ===== */
-# section[data-testid="stSidebar"] {{
-#     display: none;
-# }}
-
-# div[data-testid="stSidebarNav"] {{
-#     display: none;
-# }}
-
-# button[data-testid="baseButton-header"] {{
-#     display: none;
-# }}
-/* ================================= */
-            
 
 /* ===== SIDEBAR SCROLLABLE & RESPONSIVE ===== */
 section[data-testid="stSidebar"] {{
@@ -347,6 +232,7 @@ header, footer {{ display:none; }}
     margin:0 auto;
     padding-top:{ "150px" if not has_interaction else "72px" };
     padding-bottom:200px;
+    text-align:{ "center" if not has_interaction else "left" };
 }}
 
 /* ===== CHAT CLEANUP ===== */
@@ -375,31 +261,6 @@ div[data-testid="stTextInput"] button {{
     display: none !important;
 }}
 
-/* ===== HILANGKAN ICON / AVATAR CHAT ===== */
-div[data-testid="stChatMessageAvatar"] {{
-    display: none !important;
-}}
-
-div[data-testid="stChatMessageContent"] {{
-    margin-left: 0 !important;
-}}
-/* ================================= */
-
-.stApp {{
-    color: #e8e8e8;
-    font-family: Manrope, system-ui;
-}}
-
-header, footer {{ display:none; }}
-
-.block-container {{
-    max-width:760px;
-    margin:0 auto;
-    padding-top:{ "150px" if not has_interaction else "72px" };
-    padding-bottom:200px;
-    text-align:{ "center" if not has_interaction else "left" };
-}}
-
 .hero-title {{
     font-size:42px;
     font-weight:700;
@@ -479,6 +340,47 @@ if not has_interaction:
     """, unsafe_allow_html=True)
 
 
+def reset_history_page():
+    st.session_state.history_visible = HISTORY_PAGE_SIZE
+
+
+def more_history():
+    st.session_state.history_visible = (
+        st.session_state.get("history_visible", HISTORY_PAGE_SIZE) + HISTORY_PAGE_SIZE
+    )
+
+
+@st.fragment
+def history_panel():
+    # hanya satu halaman yang dirender; cari & "muat lagi" cukup me-rerun
+    # fragment ini, bukan seluruh halaman
+    query = st.text_input(
+        "Cari history",
+        key="history-query",
+        placeholder="🔍 Cari topik…",
+        label_visibility="collapsed",
+        on_change=reset_history_page
+    )
+    visible = st.session_state.get("history_visible", HISTORY_PAGE_SIZE)
+
+    # satu item ekstra untuk tahu apakah masih ada halaman berikutnya
+    history = store.search_history(query, limit=visible + 1)
+    if not history:
+        st.caption("Tidak ditemukan" if query else "Belum ada history")
+        return
+
+    for idx, item in enumerate(history[:visible]):
+        if st.button(item, key=f"history-{idx}", use_container_width=True):
+            # LOAD HANYA GILIRAN (PROMPT + JAWABAN) MILIK HISTORY ITEM
+            st.session_state.messages = store.load_turn(item)
+            reset_chat_view()
+            st.rerun()
+
+    if len(history) > visible:
+        st.button("Muat lebih banyak", key="history-more",
+                  on_click=more_history, use_container_width=True)
+
+
 with st.sidebar:
     col1, col2 = st.columns([4, 1])
 
@@ -488,13 +390,9 @@ with st.sidebar:
     with col2:
         if st.button("🗑️", key="delete-history", help="Hapus semua history"):
             # Hapus history dan messages
-            st.session_state.history = []
             st.session_state.messages = []
-
-            if os.path.exists(HISTORY_FILE):
-                os.remove(HISTORY_FILE)
-            if os.path.exists(MESSAGES_FILE):
-                os.remove(MESSAGES_FILE)
+            reset_chat_view()
+            store.clear()
 
             st.success("History berhasil dihapus!")
             st.rerun()  # <-- gunakan ini di Streamlit terbaru
@@ -533,37 +431,67 @@ with st.sidebar:
 
         # Python side: cek klik tombol
         if st.session_state.get("delete_history_click"):
-            st.session_state.history = []
             st.session_state.messages = []
-
-            if os.path.exists(HISTORY_FILE):
-                os.remove(HISTORY_FILE)
-            if os.path.exists(MESSAGES_FILE):
-                os.remove(MESSAGES_FILE)
+            reset_chat_view()
+            store.clear()
 
             st.success("History berhasil dihapus!")
             st.session_state._rerun()
 
 
 
-    # Tampilkan history
-    if not st.session_state.history:
-        st.caption("Belum ada history")
-
-    else:
-         for idx, item in enumerate(st.session_state.history):
-            if st.button(item, key=f"history-{idx}", use_container_width=True):
-                # LOAD MESSAGES YANG SESUAI DENGAN HISTORY ITEM
-                all_messages = load_messages()  # semua pesan
-                # filter messages sampai terakhir kali user input sama dengan history
-                messages_for_item = []
-                for msg in all_messages:
-                    messages_for_item.append(msg)
-                    if msg["role"] == "user" and msg["content"] == item:
-                        break
+    # Opsi cache: paksa generate ulang tanpa memakai hasil tersimpan
+    st.toggle(
+        "🔄 Generate ulang (tanpa cache)",
+        key="bypass-cache",
+        help="Abaikan hasil cache dan minta konten baru ke model"
+    )
+    st.toggle(
+        "🎯 Variasi judul & CTA",
+        key="variants",
+        help=f"Tambahkan {VARIANT_COUNT} alternatif SEO title, meta description, dan CTA"
+    )
+    stats = cache_stats()
+    similar_hits = stats.get("semantic", {}).get("hits", 0)
+    st.caption(
+        f"Cache: {stats['hits']} hit · {similar_hits} mirip · {stats['misses']} miss"
+    )
 
-                st.session_state.messages = messages_for_item
-                st.rerun()
+    # Ekspor semua SEO pack session ini; file baru dibuat saat tombol diklik
+    export_col1, export_col2 = st.columns([2, 3])
+    with export_col1:
+        export_format = st.selectbox(
+            "Format ekspor",
+            available_formats(),
+            key="export-format",
+            label_visibility="collapsed"
+        )
+
+    def build_export():
+        # ditulis bertahap ke file sementara, bukan dirakit di memori
+        buffer = tempfile.TemporaryFile()
+        if export_format == "parquet":
+            export_packs(iter_packs(store.messages), export_format, buffer)
+        else:
+            text = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
+            export_packs(iter_packs(store.messages), export_format, text)
+            text.flush()
+            text.detach()
+        buffer.seek(0)
+        return buffer
+
+    with export_col2:
+        st.download_button(
+            "⬇️ Ekspor",
+            data=build_export,
+            file_name=f"seo_packs.{export_format}",
+            mime=FORMATS[export_format],
+            key="export",
+            on_click="ignore",
+            use_container_width=True
+        )
+
+    history_panel()
 
 
 
@@ -571,61 +499,148 @@ with st.sidebar:
 # =========================================================
 # CHAT HISTORY
 # =========================================================
-for msg in st.session_state.messages:
-    if msg["role"] == "user":
-        with st.chat_message("user"):
-            st.markdown(f"<div class='chat-user'>{msg['content']}</div>", unsafe_allow_html=True)
+def render_variants(variants: list):
+    with st.expander(f"🎯 {len(variants)} variasi judul & CTA"):
+        for rank, variant in enumerate(variants, start=1):
+            st.markdown(
+                f"**{rank}. {variant['seo_title']}**  \n"
+                f"{variant['meta_description']}  \n"
+                f"_CTA:_ {variant['cta']}"
+            )
+
+
+@st.cache_data(max_entries=RENDER_CACHE_ENTRIES, show_spinner=False)
+def render_card(content: str, sections: dict = None) -> str:
+    # HTML card di-memo per isi pesan, tidak dibangun ulang setiap rerun
+    # (pesan lama tanpa "sections" diparse di sini)
+    if sections is not None:
+        sections = MarketingSections.from_dict(sections)
+    return format_marketing_response(content, sections)
+
+
+messages = st.session_state.messages
+start = max(0, len(messages) - st.session_state.visible_messages)
+
+if start > 0:
+    if st.button(f"⬆️ Tampilkan pesan sebelumnya ({start})", key="load-older"):
+        st.session_state.visible_messages += MESSAGE_PAGE_SIZE
+        st.rerun()
+
+# hanya beberapa card terbaru yang langsung di-mount sebagai iframe
+card_indexes = [i for i in range(start, len(messages)) if is_generated(messages[i])]
+live_cards = set(card_indexes[-LIVE_CARDS:]) | st.session_state.expanded_cards
+
+with span("render.history"):
+    for idx in range(start, len(messages)):
+        msg = messages[idx]
+        if msg["role"] == "user":
+            with st.chat_message("user"):
+                st.markdown(f"<div class='chat-user'>{msg['content']}</div>", unsafe_allow_html=True)
+        else:
+            with st.chat_message("assistant"):
+
+                # JIKA PESAN VALIDASI / ERROR → TAMPILKAN TEKS BIASA
+                if not is_generated(msg):
+                    st.markdown(msg["content"])
+
+                # JIKA OUTPUT AI → TAMPILKAN CARD SEO
+                elif idx in live_cards:
+                    components.html(
+                        render_card(msg["content"], msg.get("sections")),
+                        height=520,
+                        scrolling=True
+                    )
+                    if msg.get("variants"):
+                        render_variants(msg["variants"])
+
+                # CARD LAMA → DIMUAT SAAT DIBUKA
+                else:
+                    title = (msg.get("sections") or {}).get("SEO_TITLE") or "hasil sebelumnya"
+                    if st.button(f"📄 Tampilkan: {title}", key=f"expand-card-{idx}"):
+                        st.session_state.expanded_cards.add(idx)
+                        st.rerun()
+
+# =========================================================
+# JOB BERJALAN
+# =========================================================
+# ID job ikut disimpan di URL (?job=...) supaya hasil tetap ditunggu setelah reload
+pending_job = st.query_params.get("job")
+
+
+@st.fragment(run_every=JOB_POLL_INTERVAL)
+def render_job(job_id: str):
+    # hanya fragment ini yang di-rerun saat polling, bukan seluruh halaman
+    job = get_jobs().get(job_id)
+    if job is None:
+        del st.query_params["job"]
+        st.rerun(scope="app")
+
+    if job["status"] in ("done", "error"):
+        # worker sudah menyimpan pesan ke store; cukup tambahkan ke session
+        # (kecuali session ini baru dimuat ulang dan pesannya sudah terbaca)
+        if job["result"] not in st.session_state.messages[-1:]:
+            add_message(job["result"], persist=False)
+        del st.query_params["job"]
+        st.rerun(scope="app")
+
+    if job["progress"]:
+        components.html(
+            format_marketing_response(job["progress"]),
+            height=520,
+            scrolling=True
+        )
     else:
-        with st.chat_message("assistant"):
+        st.caption("Generating marketing content...")
 
-            # JIKA PESAN VALIDASI → TAMPILKAN TEKS BIASA
-            if msg.get("type") == "validation":
-                st.markdown(msg["content"])
 
-            # JIKA OUTPUT AI → TAMPILKAN CARD SEO
-            else:
-                components.html(
-                    format_marketing_response(msg["content"]),
-                    height=520,
-                    scrolling=True
-                )
+if pending_job:
+    with st.chat_message("assistant"):
+        render_job(pending_job)
 
 # =========================================================
 # INPUT
 # =========================================================
+# input dikunci selama job berjalan supaya urutan prompt & jawaban tetap
 prompt = st.chat_input(
-    "Contoh: jasa renovasi rumah, produk skincare, jasa pembuatan website…"
+    "Contoh: jasa renovasi rumah, produk skincare, jasa pembuatan website…",
+    disabled=bool(pending_job)
 )
 
 if prompt:
-    # simpan user message
-    user_msg = {"role": "user", "content": prompt}
-    st.session_state.messages.append(user_msg)
-    save_messages(st.session_state.messages)  # simpan ke file
-
-    # simpan ke sidebar history (hindari duplikat)
-    if prompt not in st.session_state.history:
-        st.session_state.history.insert(0, prompt)
-        save_history(st.session_state.history)
-
-    # validasi konteks
-    if not is_marketing_context(prompt):
-        validation_msg = {
-            "role": "assistant",
-            "type": "validation",
-            "content": INVALID_CONTEXT_RESPONSE
-        }
-        st.session_state.messages.append(validation_msg)
-        save_messages(st.session_state.messages)  # simpan validation
+    # bagian UI saja (validasi + submit); generate diukur di span "turn" worker
+    with span("turn.submit"):
+        # riwayat sebelum prompt ini (untuk follow-up)
+        previous = list(st.session_state.messages)
+
+        # simpan user message
+        user_msg = {"role": "user", "content": prompt}
+        add_message(user_msg)  # simpan ke file
+
+        # simpan ke sidebar history (duplikat dipindah ke paling atas)
+        store.add_history(prompt)
+
+        # topik baru berdiri sendiri; instruksi tanpa kata kunci bisnis
+        # ("buat lebih formal") dianggap follow-up dari hasil sebelumnya
+        is_topic = is_marketing_context(prompt)
+        has_result = any(is_generated(m) for m in reversed(previous))
+
+        # validasi konteks
+        if not is_topic and not (has_result and is_follow_up(prompt)):
+            validation_msg = {
+                "role": "assistant",
+                "type": "validation",
+                "content": INVALID_CONTEXT_RESPONSE
+            }
+            add_message(validation_msg)  # simpan validation
+            st.rerun()
+
+        # generate konten marketing dijalankan worker di latar belakang;
+        # halaman hanya menyimpan ID job lalu mem-polling hasilnya
+        st.query_params["job"] = get_jobs().submit(
+            st.query_params["sid"],
+            prompt,
+            history=None if is_topic else previous,
+            bypass_cache=st.session_state.get("bypass-cache", False),
+            want_variants=st.session_state.get("variants", False),
+        )
         st.rerun()
-
-    # generate konten marketing
-    with st.spinner("Generating marketing content..."):
-        response = generate_marketing_content(prompt)
-
-    ai_msg = {"role": "assistant", "content": response}
-    st.session_state.messages.append(ai_msg)
-    save_messages(st.session_state.messages)  # simpan AI message
-    st.rerun()
-
-
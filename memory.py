@@ -0,0 +1,101 @@
+import os
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from formatter import MarketingSections, parse_marketing_response
+
+# anggaran token untuk riwayat yang ikut dikirim ke model
+MEMORY_TOKEN_BUDGET = int(os.getenv("LLM_MEMORY_TOKENS", 2000))
+
+# batas jumlah pesan yang disimpan di session (memori per user)
+MAX_SESSION_MESSAGES = int(os.getenv("MAX_SESSION_MESSAGES", 200))
+
+# giliran lama yang tidak muat anggaran diringkas, maksimal sebanyak ini
+MAX_SUMMARY_TURNS = 10
+
+
+def count_tokens(text: str) -> int:
+    # ~4 karakter per token untuk teks Indonesia/Inggris; cukup untuk budgeting
+    return len(text) // 4 + 1
+
+
+def count_message_tokens(messages: list) -> int:
+    # +4 token overhead role/pemisah per pesan
+    return sum(count_tokens(m.content) + 4 for m in messages)
+
+
+def is_generated(message: dict) -> bool:
+    return (
+        message.get("role") == "assistant"
+        and message.get("type") not in ("validation", "error")
+    )
+
+
+def split_turns(messages: list) -> list:
+    # [(user dict, assistant dict atau None)], validasi/error dilewati
+    turns = []
+    for message in messages:
+        if message.get("role") == "user":
+            turns.append([message, None])
+        elif is_generated(message) and turns:
+            turns[-1][1] = message
+    return [tuple(turn) for turn in turns]
+
+
+def summarize_turn(user: dict, assistant: dict) -> str:
+    if assistant is None:
+        return f"- {user['content']}"
+
+    if "sections" in assistant:
+        sections = MarketingSections.from_dict(assistant["sections"])
+    else:
+        sections = parse_marketing_response(assistant["content"])
+
+    title = sections.seo_title or "-"
+    keyword = sections.focus_keyword or "-"
+    return f"- {user['content']} → judul: {title}; keyword: {keyword}"
+
+
+def build_context(history: list, budget: int = MEMORY_TOKEN_BUDGET) -> list:
+    # giliran terbaru dikirim utuh selama muat anggaran,
+    # sisanya diringkas (judul + keyword) tanpa panggilan model tambahan
+    turns = split_turns(history or [])
+
+    recent = []
+    used = 0
+    while turns:
+        user, assistant = turns[-1]
+        turn = [HumanMessage(content=user["content"])]
+        if assistant is not None:
+            turn.append(AIMessage(content=assistant["content"]))
+
+        cost = count_message_tokens(turn)
+        if used + cost > budget:
+            break
+
+        recent = turn + recent
+        used += cost
+        turns.pop()
+
+    if not turns:
+        return recent
+
+    lines = [summarize_turn(u, a) for u, a in turns[-MAX_SUMMARY_TURNS:]]
+    summary = SystemMessage(
+        content="Ringkasan percakapan sebelumnya:\n" + "\n".join(lines)
+    )
+    if used + count_message_tokens([summary]) > budget:
+        return recent
+    return [summary] + recent
+
+
+def trim_messages(messages: list, limit: int = MAX_SESSION_MESSAGES) -> list:
+    if len(messages) <= limit:
+        return messages
+
+    messages = messages[-limit:]
+    # mulai dari giliran yang utuh
+    for idx, message in enumerate(messages):
+        if message.get("role") == "user":
+            return messages[idx:]
+    return []
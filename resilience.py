@@ -0,0 +1,266 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+
+# estimasi token panggilan yang sedang berjalan di thread/task ini
+_call_tokens = ContextVar("call_tokens", default=0)
+
+
+class LLMUnavailableError(RuntimeError):
+    pass
+
+
+class CircuitOpenError(LLMUnavailableError):
+    pass
+
+
+class RateLimitShedError(LLMUnavailableError):
+    pass
+
+
+class TokenBucket:
+    def __init__(self, rate_per_min: float, capacity: float = None):
+        self.rate = rate_per_min / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_min
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float, max_wait: float) -> float:
+        # kembalikan lama menunggu; None jika melebihi max_wait (request dibuang)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+
+            amount = min(amount, self.capacity)
+            wait = max(0.0, (amount - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+
+            # saldo boleh negatif: antrean berikutnya ikut menunggu
+            self._tokens -= amount
+            return wait
+
+    def refund(self, amount: float):
+        # kembalikan reservasi yang batal dipakai (bucket lain menolak)
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + min(amount, self.capacity))
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        # waktu mulai satu-satunya request percobaan saat half-open
+        self._probe_started = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "half-open":
+                # hanya satu request percobaan; percobaan yang tidak pernah
+                # melapor (dibatalkan) dianggap selesai setelah reset_timeout
+                now = time.monotonic()
+                probing = (
+                    self._probe_started is not None
+                    and now - self._probe_started < self.reset_timeout
+                )
+                if not probing:
+                    self._probe_started = now
+                    return
+            if state != "closed":
+                raise CircuitOpenError("LLM upstream sedang tidak sehat, coba lagi nanti.")
+
+    def release_probe(self):
+        # request percobaan batal dikirim atau gagal bukan karena upstream
+        with self._lock:
+            self._probe_started = None
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            # half-open yang gagal langsung membuka lagi
+            if self._failures >= self.failure_threshold or self._opened_at is not None:
+                self._opened_at = time.monotonic()
+            self._probe_started = None
+
+
+def status_code(exc: Exception):
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code
+
+
+def retry_after(exc: Exception):
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def is_retryable(exc: Exception) -> bool:
+    code = status_code(exc)
+    if code is not None:
+        return code == 429 or code >= 500
+
+    name = type(exc).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+class ResilientCaller:
+    def __init__(self, requests_per_min: float, tokens_per_min: float,
+                 max_retries: int = 4, base_delay: float = 0.5,
+                 max_delay: float = 20.0, max_wait: float = 20.0,
+                 breaker: CircuitBreaker = None):
+        self.request_bucket = TokenBucket(requests_per_min)
+        self.token_bucket = TokenBucket(tokens_per_min)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_wait = max_wait
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = {
+            "calls": 0, "retries": 0, "shed": 0,
+            "circuit_rejections": 0, "failures": 0,
+        }
+        self._lock = threading.Lock()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.metrics[name] += 1
+
+    def _admit(self, tokens: int) -> float:
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            self._count("circuit_rejections")
+            raise
+
+        wait = self._reserve(tokens, self.max_wait)
+        if wait is None:
+            self.breaker.release_probe()
+            self._count("shed")
+            raise RateLimitShedError("Batas request ke LLM tercapai, coba lagi sebentar.")
+
+        self._count("calls")
+        return wait
+
+    def _reserve(self, tokens: int, max_wait: float) -> float:
+        # reservasi RPM & TPM sekaligus; jika salah satu menolak, yang sudah
+        # terpotong dikembalikan supaya request yang dibuang tidak memakai kuota
+        wait_requests = self.request_bucket.reserve(1, max_wait)
+        wait_tokens = self.token_bucket.reserve(tokens, max_wait)
+        if wait_requests is None or wait_tokens is None:
+            if wait_requests is not None:
+                self.request_bucket.refund(1)
+            if wait_tokens is not None:
+                self.token_bucket.refund(tokens)
+            return None
+        return max(wait_requests, wait_tokens)
+
+    def admit_extra(self) -> bool:
+        # request tambahan router (hedge/fallback) di dalam call() ikut memakai
+        # kuota RPM & TPM; tidak menunggu: jika kuota habis tidak dikirim
+        if self.breaker.state != "closed":
+            return False
+        if self._reserve(_call_tokens.get(), 0.0) is None:
+            return False
+        self._count("calls")
+        return True
+
+    def _backoff(self, attempt: int, exc: Exception) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = random.uniform(delay / 2, delay)
+        hinted = retry_after(exc)
+        return max(delay, hinted) if hinted is not None else delay
+
+    def _on_error(self, attempt: int, exc: Exception) -> float:
+        if not is_retryable(exc):
+            self.breaker.release_probe()
+            raise exc
+
+        self.breaker.record_failure()
+        if attempt >= self.max_retries or self.breaker.state == "open":
+            self._count("failures")
+            raise LLMUnavailableError(str(exc)) from exc
+
+        self._count("retries")
+        return self._backoff(attempt, exc)
+
+    def call(self, fn, tokens: int = 0):
+        _call_tokens.set(tokens)
+        attempt = 0
+        while True:
+            time.sleep(self._admit(tokens))
+            try:
+                result = fn()
+            except Exception as exc:
+                time.sleep(self._on_error(attempt, exc))
+                attempt += 1
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    async def acall(self, fn, tokens: int = 0):
+        _call_tokens.set(tokens)
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._admit(tokens))
+            try:
+                result = await fn()
+            except Exception as exc:
+                await asyncio.sleep(self._on_error(attempt, exc))
+                attempt += 1
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    def stream(self, fn, tokens: int = 0):
+        # retry hanya sampai chunk pertama; setelah itu error diteruskan
+        def first_chunk():
+            iterator = iter(fn())
+            return iterator, next(iterator, None)
+
+        iterator, first = self.call(first_chunk, tokens)
+        if first is None:
+            return
+        yield first
+        yield from iterator
+
+
+def create_caller() -> ResilientCaller:
+    return ResilientCaller(
+        requests_per_min=float(os.getenv("LLM_RPM", 30)),
+        tokens_per_min=float(os.getenv("LLM_TPM", 30000)),
+        max_retries=int(os.getenv("LLM_MAX_RETRIES", 4)),
+        max_wait=float(os.getenv("LLM_MAX_WAIT", 20)),
+    )
@@ -0,0 +1,376 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextvars import ContextVar
+
+from resilience import is_retryable
+from telemetry import count, observe
+
+# hedging: "auto" = setelah min(p95, p50 x HEDGE_P50_MULTIPLIER) backend
+# utama, "off", atau detik tetap
+HEDGE_AFTER = os.getenv("LLM_HEDGE_AFTER", "auto").lower()
+
+# p95 jendela 50 sampel ikut naik begitu ada beberapa lonjakan (lonjakan
+# itu sendiri), jadi tenggat auto juga dibatasi kelipatan p50
+HEDGE_P50_MULTIPLIER = 2.0
+
+# jumlah sampel latency/error terakhir per backend
+ROUTER_WINDOW = 50
+
+# sampel minimal sebelum p95 dipakai sebagai tenggat hedging
+MIN_SAMPLES = 5
+
+# backend dianggap tidak sehat jika error rate melewati batas ini dan
+# error terakhir masih dalam masa cooldown
+MAX_ERROR_RATE = 0.5
+UNHEALTHY_COOLDOWN = 30.0
+
+# sesekali request dikirim ke backend lain supaya statistiknya tidak basi
+EXPLORE_RATE = 0.05
+
+HEDGE_WORKERS = 8
+
+# jenis panggilan dengan jendela latency sendiri: generate penuh, chunk pertama
+# stream, dan panggilan structured pendek (perbaikan field, variasi)
+CALL_KINDS = ("invoke", "stream", "structured")
+
+API_KEY_ENV = {
+    "groq": "GROQ_API_KEY",
+    "openai": "OPENAI_API_KEY",
+}
+
+
+def _percentile(values, pct: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+class Backend:
+    def __init__(self, provider: str, model: str, base_url: str = None,
+                 temperature: float = 0, window: int = ROUTER_WINDOW):
+        if provider not in API_KEY_ENV:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+
+        self.provider = provider
+        self.model = model
+        self.base_url = base_url
+        self.temperature = temperature
+        self._client = None
+        self._lock = threading.Lock()
+
+        # latency sukses per jenis panggilan (invoke/structured = total,
+        # stream = chunk pertama)
+        self._latencies = {kind: deque(maxlen=window) for kind in CALL_KINDS}
+        self._outcomes = deque(maxlen=window)
+        self._last_error = None
+
+    @property
+    def name(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+    def client(self):
+        # client dibuat sekali saat pertama dipakai; koneksi HTTP ikut bertahan
+        if self._client is not None:
+            return self._client
+
+        with self._lock:
+            if self._client is None:
+                key_env = API_KEY_ENV[self.provider]
+                if not os.getenv(key_env):
+                    raise EnvironmentError(f"{key_env} not found in environment variables.")
+
+                options = {"model": self.model, "temperature": self.temperature,
+                           "max_retries": 0}
+                if self.base_url:
+                    options["base_url"] = self.base_url
+
+                # retry ditangani resilience layer, bukan oleh client provider
+                if self.provider == "groq":
+                    from langchain_groq import ChatGroq
+                    self._client = ChatGroq(**options)
+                else:
+                    from langchain_openai import ChatOpenAI
+                    self._client = ChatOpenAI(**options)
+        return self._client
+
+    def warm_up(self):
+        client = self.client()
+        if self.provider == "groq":
+            client.client._client.models.list()
+        else:
+            client.root_client.models.list()
+
+    def record(self, kind: str, seconds: float = None, error: bool = False):
+        with self._lock:
+            self._outcomes.append(error)
+            if error:
+                self._last_error = time.monotonic()
+            else:
+                self._latencies[kind].append(seconds)
+        if seconds is not None:
+            observe("llm.backend", seconds, backend=self.name, kind=kind)
+
+    def latency(self, kind: str, pct: float = 0.5):
+        with self._lock:
+            return _percentile(list(self._latencies[kind]), pct)
+
+    def samples(self, kind: str) -> int:
+        return len(self._latencies[kind])
+
+    def error_rate(self) -> float:
+        with self._lock:
+            return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def healthy(self) -> bool:
+        if self._last_error is None or self.error_rate() <= MAX_ERROR_RATE:
+            return True
+        # setelah cooldown backend boleh dicoba lagi (probe)
+        return time.monotonic() - self._last_error >= UNHEALTHY_COOLDOWN
+
+    def stats(self) -> dict:
+        return {
+            "p50_ms": _ms(self.latency("invoke", 0.5)),
+            "p95_ms": _ms(self.latency("invoke", 0.95)),
+            "stream_p50_ms": _ms(self.latency("stream", 0.5)),
+            "structured_p50_ms": _ms(self.latency("structured", 0.5)),
+            "error_rate": round(self.error_rate(), 3),
+            "healthy": self.healthy(),
+        }
+
+
+# backend yang menjawab panggilan router terakhir di thread/task ini
+_served_by = ContextVar("served_by", default=None)
+
+
+def served_by() -> str:
+    return _served_by.get()
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+class ModelRouter:
+    def __init__(self, backends: list, hedge_after: str = HEDGE_AFTER, admit=None):
+        if not backends:
+            raise ValueError("ModelRouter needs at least one backend")
+
+        self.backends = backends
+        self.hedge_after = hedge_after
+        # admit() -> bool dipanggil sebelum setiap request tambahan (hedge atau
+        # fallback) supaya ikut dihitung batas RPM/TPM; False = tidak dikirim
+        self.admit = admit
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    def signature(self) -> str:
+        # identitas pool untuk namespace cache
+        return ",".join(backend.model for backend in self.backends)
+
+    def ranked(self, kind: str = "invoke") -> list:
+        # sehat dulu, lalu p50 tercepat; backend tanpa sampel dicoba lebih dulu
+        # supaya statistiknya terisi (urutan konfigurasi jadi tie-breaker)
+        ranked = sorted(
+            self.backends,
+            key=lambda b: (not b.healthy(), b.latency(kind) or 0.0)
+        )
+
+        others = [i for i, b in enumerate(ranked) if i > 0 and b.healthy()]
+        if others and random.random() < EXPLORE_RATE:
+            ranked.insert(0, ranked.pop(random.choice(others)))
+        return ranked
+
+    def hedge_delay(self, primary: Backend, kind: str = "invoke"):
+        if self.hedge_after == "off":
+            return None
+        if self.hedge_after != "auto":
+            return float(self.hedge_after)
+        if primary.samples(kind) < MIN_SAMPLES:
+            return None
+        return min(
+            primary.latency(kind, 0.95),
+            primary.latency(kind, 0.5) * HEDGE_P50_MULTIPLIER
+        )
+
+    def _admit_extra(self) -> bool:
+        return self.admit is None or self.admit()
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=HEDGE_WORKERS, thread_name_prefix="llm-router"
+                )
+        return self._pool
+
+    @staticmethod
+    def _run(backend: Backend, call, kind: str = "invoke"):
+        client = backend.client()
+        started = time.perf_counter()
+        try:
+            result = call(client)
+        except Exception:
+            backend.record(kind, error=True)
+            raise
+        backend.record(kind, time.perf_counter() - started)
+        return result, backend
+
+    def invoke(self, call, kind: str = "invoke"):
+        # call(client) -> hasil; backend kedua menyusul jika backend utama
+        # belum selesai setelah tenggat hedging, hasil pertama yang sukses dipakai
+        backends = self.ranked(kind)
+        if len(backends) == 1:
+            result, backend = self._run(backends[0], call, kind)
+            _served_by.set(backend.name)
+            return result
+
+        primary, rest = backends[0], backends[1:]
+        pool = self._executor()
+        pending = {pool.submit(self._run, primary, call, kind)}
+        delay = self.hedge_delay(primary, kind)
+        last_exc = None
+
+        while pending:
+            done, pending = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                if self._admit_extra():
+                    count("router_hedges")
+                    pending.add(pool.submit(self._run, rest.pop(0), call, kind))
+                delay = None
+                continue
+
+            for future in done:
+                try:
+                    result, backend = future.result()
+                except Exception as exc:
+                    if not is_retryable(exc):
+                        raise
+                    last_exc = exc
+                    continue
+                _served_by.set(backend.name)
+                return result
+
+            # semua yang selesai gagal: langsung pindah ke backend berikutnya
+            # (tanpa kuota, error diteruskan ke ResilientCaller yang menunggu)
+            if not pending and rest and self._admit_extra():
+                count("router_fallbacks")
+                pending.add(pool.submit(self._run, rest.pop(0), call, kind))
+                delay = None
+
+        raise last_exc
+
+    async def ainvoke(self, call, kind: str = "invoke"):
+        # versi async: call(client) -> coroutine; yang kalah dibatalkan
+        async def run(backend: Backend):
+            client = backend.client()
+            started = time.perf_counter()
+            try:
+                result = await call(client)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                backend.record(kind, error=True)
+                raise
+            backend.record(kind, time.perf_counter() - started)
+            return result, backend
+
+        backends = self.ranked(kind)
+        primary, rest = backends[0], backends[1:]
+        pending = {asyncio.ensure_future(run(primary))}
+        delay = self.hedge_delay(primary, kind) if rest else None
+        last_exc = None
+
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    if self._admit_extra():
+                        count("router_hedges")
+                        pending.add(asyncio.ensure_future(run(rest.pop(0))))
+                    delay = None
+                    continue
+
+                for task in done:
+                    exc = task.exception()
+                    if exc is None:
+                        result, backend = task.result()
+                        _served_by.set(backend.name)
+                        return result
+                    if not is_retryable(exc):
+                        raise exc
+                    last_exc = exc
+
+                if not pending and rest and self._admit_extra():
+                    count("router_fallbacks")
+                    pending.add(asyncio.ensure_future(run(rest.pop(0))))
+                    delay = None
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise last_exc
+
+    def stream(self, call):
+        # stream tidak di-hedge (dua stream paralel = token ganda); backend
+        # berikutnya hanya dipakai jika gagal sebelum chunk pertama
+        last_exc = None
+        for backend in self.ranked("stream"):
+            if last_exc is not None:
+                if not self._admit_extra():
+                    break
+                count("router_fallbacks")
+            client = backend.client()
+            started = time.perf_counter()
+            try:
+                iterator = iter(call(client))
+                first = next(iterator, None)
+            except Exception as exc:
+                backend.record("stream", error=True)
+                if not is_retryable(exc):
+                    raise
+                last_exc = exc
+                continue
+
+            backend.record("stream", time.perf_counter() - started)
+            _served_by.set(backend.name)
+            if first is not None:
+                yield first
+            yield from iterator
+            return
+
+        raise last_exc
+
+    def warm_up(self):
+        for backend in self.backends:
+            try:
+                backend.warm_up()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        return {backend.name: backend.stats() for backend in self.backends}
+
+
+def parse_backends(spec: str, temperature: float = 0) -> list:
+    backends = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        target, _, base_url = item.partition("@")
+        provider, _, model = target.partition(":")
+        backends.append(Backend(provider, model, base_url or None, temperature))
+    return backends
+
+
+def create_router(default_spec: str, temperature: float = 0, admit=None) -> ModelRouter:
+    # LLM_BACKENDS: "provider:model[@base_url]" dipisah koma, urutan = prioritas awal
+    return ModelRouter(
+        parse_backends(os.getenv("LLM_BACKENDS", default_spec), temperature),
+        admit=admit
+    )
@@ -0,0 +1,98 @@
+from dataclasses import fields, replace
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel, Field, create_model
+
+from formatter import MarketingSections
+
+# batas keras dari prompt sistem (karakter)
+FIELD_LIMITS = {
+    "seo_title": 60,
+    "meta_description": 155,
+}
+
+# rentang jumlah kata CONTENT_SNIPPET dari prompt sistem; tidak diperbaiki saat
+# runtime (terlalu mahal), hanya dicek oleh regression suite
+SNIPPET_WORDS = (380, 420)
+
+FIELD_DESCRIPTIONS = {
+    "seo_title": "Judul SEO, maksimal 60 karakter",
+    "meta_description": "Meta description, maksimal 155 karakter",
+    "focus_keyword": "Satu focus keyword utama",
+    "secondary_keywords": "Keyword turunan, dipisah koma",
+    "hashtags": "Hashtag relevan, dipisah spasi",
+    "cta": "Satu kalimat call to action",
+    "content_snippet": "Konten utama 380–420 kata, paragraf utuh",
+}
+
+
+class SEOPack(BaseModel):
+    # hanya sumber spesifikasi field (deskripsi + maxLength) untuk schema
+    # perbaikan di repair_model; validasi pack berjalan lewat find_violations
+    # pada MarketingSections hasil parser
+    seo_title: str = Field(description=FIELD_DESCRIPTIONS["seo_title"],
+                           json_schema_extra={"maxLength": FIELD_LIMITS["seo_title"]})
+    meta_description: str = Field(description=FIELD_DESCRIPTIONS["meta_description"],
+                                  json_schema_extra={"maxLength": FIELD_LIMITS["meta_description"]})
+    focus_keyword: str = Field(description=FIELD_DESCRIPTIONS["focus_keyword"])
+    secondary_keywords: str = Field(description=FIELD_DESCRIPTIONS["secondary_keywords"])
+    hashtags: str = Field(description=FIELD_DESCRIPTIONS["hashtags"])
+    cta: str = Field(description=FIELD_DESCRIPTIONS["cta"])
+    content_snippet: str = Field(description=FIELD_DESCRIPTIONS["content_snippet"])
+
+
+REPAIR_SYSTEM_PROMPT = SystemMessage(content=(
+    "Kamu memperbaiki sebagian field dari SEO pack berbahasa Indonesia. "
+    "Isi hanya field yang diminta, patuhi batas karakter dengan ketat, "
+    "pertahankan focus keyword dan gaya yang sama, tanpa menyebut AI/model."
+))
+
+
+def find_violations(sections: MarketingSections) -> dict:
+    # field -> alasan; kosong berarti lolos validasi
+    violations = {}
+    for f in fields(sections):
+        value = getattr(sections, f.name)
+        limit = FIELD_LIMITS.get(f.name)
+        if not value:
+            violations[f.name] = "kosong atau format rusak"
+        elif limit is not None and len(value) > limit:
+            violations[f.name] = f"{len(value)} karakter, maksimal {limit}"
+    return violations
+
+
+def repair_model(field_names: list) -> type:
+    # sub-model berisi field yang gagal saja, untuk with_structured_output
+    return create_model(
+        "SEOPackRepair",
+        **{name: (str, SEOPack.model_fields[name]) for name in field_names}
+    )
+
+
+def build_repair_messages(user_prompt: str, sections: MarketingSections,
+                          violations: dict) -> list:
+    lines = [
+        f"Topik: {user_prompt}",
+        f"Focus keyword: {sections.focus_keyword or '-'}",
+        "",
+        "Perbaiki field berikut:",
+    ]
+    for name, reason in violations.items():
+        current = getattr(sections, name)
+        lines.append(f"- {name} ({FIELD_DESCRIPTIONS[name]}) — {reason}")
+        if current and name != "content_snippet":
+            lines.append(f"  nilai sekarang: {current}")
+
+    return [REPAIR_SYSTEM_PROMPT, HumanMessage(content="\n".join(lines))]
+
+
+def clip_to_limits(sections: MarketingSections) -> MarketingSections:
+    # jalan terakhir jika perbaikan gagal: potong di batas kata
+    clipped = {}
+    for name, limit in FIELD_LIMITS.items():
+        value = getattr(sections, name)
+        if value and len(value) > limit:
+            cut = value[:limit + 1]
+            cut = cut.rsplit(" ", 1)[0] if " " in cut else cut[:limit]
+            clipped[name] = cut.rstrip(" ,.;:-–|")
+    return replace(sections, **clipped) if clipped else sections
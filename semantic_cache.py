@@ -0,0 +1,157 @@
+import difflib
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+
+
+class NgramVectorizer:
+    def __init__(self, dim: int = 1024, ngram_range: tuple = (2, 4)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+
+    def transform(self, text: str) -> np.ndarray:
+        # hashed character n-gram, cukup untuk variasi ejaan/urutan kata
+        text = " " + re.sub(r"\s+", " ", text).strip().lower() + " "
+        vector = np.zeros(self.dim, dtype=np.float32)
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(text) - n + 1):
+                vector[zlib.crc32(text[i:i + n].encode("utf-8")) % self.dim] += 1.0
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+# kata pengisi yang boleh ada/tidak tanpa mengubah maksud topik
+FILLER_WORDS = {"yg", "yang", "di", "dan", "untuk", "utk", "dengan", "the", "for"}
+
+# kata yang berbeda antar prompt dianggap sama jika semirip ini (typo/singkatan)
+TOKEN_MATCH_RATIO = 0.8
+MIN_PREFIX_LEN = 3
+
+
+def _tokens(text: str) -> set:
+    return set(re.findall(r"\w+", text.lower())) - FILLER_WORDS
+
+
+def _near_match(token: str, tokens: set, joined: str) -> bool:
+    if len(token) >= MIN_PREFIX_LEN and token in joined:
+        # kata gabungan / dipisah: "antiaging" vs "anti aging"
+        return True
+    for other in tokens:
+        if len(min(token, other, key=len)) >= MIN_PREFIX_LEN and (
+            token.startswith(other) or other.startswith(token)
+        ):
+            # singkatan: "renov" vs "renovasi"
+            return True
+        if difflib.SequenceMatcher(None, token, other).ratio() >= TOKEN_MATCH_RATIO:
+            return True
+    return False
+
+
+def same_topic(a: str, b: str) -> bool:
+    # skor n-gram tinggi belum cukup ("murah" vs "mewah", "jakarta" vs
+    # "bandung"): setiap kata yang berbeda harus punya padanan dekat di sisi lain
+    tokens_a, tokens_b = _tokens(a), _tokens(b)
+    joined_a = re.sub(r"\W+", "", a.lower())
+    joined_b = re.sub(r"\W+", "", b.lower())
+    return (
+        all(_near_match(t, tokens_b, joined_b) for t in tokens_a - tokens_b)
+        and all(_near_match(t, tokens_a, joined_a) for t in tokens_b - tokens_a)
+    )
+
+
+class SemanticCache:
+    def __init__(self, threshold: float = 0.85, max_entries: int = 5000,
+                 vectorizer: NgramVectorizer = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.vectorizer = vectorizer or NgramVectorizer()
+
+        # ring buffer: baris terlama ditimpa saat penuh
+        self._vectors = np.zeros((max_entries, self.vectorizer.dim), dtype=np.float32)
+        self._namespaces = [None] * max_entries
+        self._prompts = [None] * max_entries
+        self._values = [None] * max_entries
+        # (namespace, prompt) -> baris, supaya prompt yang sama ditimpa
+        self._rows = {}
+        self._size = 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+
+    def get(self, prompt: str, namespace: str = ""):
+        started = time.perf_counter()
+        query = self.vectorizer.transform(prompt)
+
+        with self._lock:
+            value = None
+            if self._size:
+                scores = self._vectors[:self._size] @ query
+                candidates = np.flatnonzero(scores >= self.threshold)
+                for idx in candidates[np.argsort(scores[candidates])[::-1]]:
+                    if self._namespaces[idx] == namespace and same_topic(prompt, self._prompts[idx]):
+                        value = self._values[idx]
+                        break
+
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            self.lookup_seconds += time.perf_counter() - started
+
+        return value
+
+    def set(self, prompt: str, value: str, namespace: str = ""):
+        vector = self.vectorizer.transform(prompt)
+        key = (namespace, prompt)
+        with self._lock:
+            idx = self._rows.get(key)
+            if idx is None:
+                # baris baru; isi lama di slot ring buffer ini dilupakan
+                idx = self._next
+                self._rows.pop((self._namespaces[idx], self._prompts[idx]), None)
+                self._rows[key] = idx
+                self._next = (idx + 1) % self.max_entries
+                self._size = min(self._size + 1, self.max_entries)
+
+            self._vectors[idx] = vector
+            self._namespaces[idx] = namespace
+            self._prompts[idx] = prompt
+            self._values[idx] = value
+
+    def clear(self):
+        with self._lock:
+            self._size = 0
+            self._next = 0
+            self._rows = {}
+            self._namespaces = [None] * self.max_entries
+            self._prompts = [None] * self.max_entries
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "avg_lookup_ms": self.lookup_seconds / lookups * 1000 if lookups else 0.0,
+            "size": self._size,
+        }
+
+
+def create_semantic_cache():
+    # opt-in: topik yang mirip belum tentu sama (harga, kota, audiens)
+    if os.getenv("LLM_SEMANTIC_CACHE", "off").lower() != "on":
+        return None
+
+    return SemanticCache(
+        threshold=float(os.getenv("LLM_SEMANTIC_THRESHOLD", 0.85)),
+        max_entries=int(os.getenv("LLM_SEMANTIC_MAX_ENTRIES", 5000)),
+    )
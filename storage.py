@@ -0,0 +1,461 @@
+import bisect
+import difflib
+import hashlib
+import json
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+
+from memory import trim_messages
+from telemetry import span
+
+try:
+    import fcntl
+except ImportError:  # Windows: cukup lock antar-thread
+    fcntl = None
+
+# setiap tenant (session/user) punya folder sendiri di bawah DATA_DIR
+DATA_DIR = "chat_data"
+DEFAULT_TENANT = "default"
+
+MESSAGES_FILE = "messages.jsonl"
+HISTORY_FILE = "history.jsonl"
+
+# file lama (satu JSON utuh) yang dimigrasikan otomatis
+LEGACY_MESSAGES_FILE = "chat_messages.json"
+LEGACY_HISTORY_FILE = "chat_history.json"
+
+# log global sebelum data dipisah per tenant (dipindah utuh ke tenant default)
+LEGACY_MESSAGES_LOG = "chat_messages.jsonl"
+LEGACY_HISTORY_LOG = "chat_history.jsonl"
+
+# penanda bahwa tenant default (berisi data lama) sudah diberikan ke satu session
+DEFAULT_CLAIM_FILE = ".default_claimed"
+
+# jumlah topik maksimum yang disimpan per tenant (sidebar hanya merender satu halaman)
+HISTORY_LIMIT = 5000
+
+# pencarian history: kata mirip (typo) dipakai jika tidak ada kata berawalan query
+FUZZY_MATCHES = 5
+FUZZY_CUTOFF = 0.75
+
+# compaction history jika jumlah baris duplikat melebihi batas ini
+HISTORY_COMPACT_SLACK = 200
+
+# retensi per tenant: pesan terlama dibuang saat melewati batas + slack
+MESSAGE_LIMIT = 1000
+MESSAGE_COMPACT_SLACK = 200
+
+# jumlah ChatStore yang dibiarkan terbuka di memori sekaligus
+MAX_OPEN_STORES = 256
+
+
+def _encode(record) -> bytes:
+    line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+    return (line + "\n").encode("utf-8")
+
+
+def _atomic_write(path: str, records):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        for record in records:
+            f.write(_encode(record))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class AppendLog:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.RLock()
+        self._lock_file = None
+        self._depth = 0
+        # folder baru dibuat saat tulis pertama (lihat locked), bukan saat dibuka
+        if os.path.exists(self.path):
+            with self.locked():
+                self._repair_tail()
+
+    @contextmanager
+    def locked(self):
+        # lock antar-thread + flock antar-proses pada file .lock terpisah,
+        # reentrant supaya read+rewrite saat compaction tetap satu lock
+        with self._lock:
+            if self._depth == 0:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            if self._depth == 0 and fcntl is not None:
+                self._lock_file = open(f"{self.path}.lock", "a")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0 and self._lock_file is not None:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def _repair_tail(self):
+        # append yang terputus (crash) meninggalkan baris tanpa newline
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                return
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                return
+
+            # cari newline terakhir dari belakang, potong sisanya
+            pos = end
+            while pos > 0:
+                start = max(0, pos - 65536)
+                f.seek(start)
+                idx = f.read(pos - start).rfind(b"\n")
+                if idx != -1:
+                    f.truncate(start + idx + 1)
+                    return
+                pos = start
+            f.truncate(0)
+
+    def append(self, record) -> int:
+        with self.locked(), open(self.path, "ab") as f:
+            offset = f.seek(0, os.SEEK_END)
+            f.write(_encode(record))
+            f.flush()
+            os.fsync(f.fileno())
+        return offset
+
+    def scan(self):
+        if not os.path.exists(self.path):
+            return
+
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    yield offset, json.loads(line)
+                except ValueError:
+                    pass
+                offset += len(line)
+
+    def read(self) -> list:
+        return [record for _, record in self.scan()]
+
+    def read_range(self, start: int, end: int = None) -> list:
+        if not os.path.exists(self.path):
+            return []
+
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            data = f.read() if end is None else f.read(end - start)
+
+        records = []
+        for line in data.splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        return records
+
+    def rewrite(self, records):
+        with self.locked():
+            _atomic_write(self.path, records)
+
+    def clear(self):
+        if not os.path.exists(self.path):
+            return
+        with self.locked():
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def _migrate_legacy(legacy_path: str, log: AppendLog, to_records):
+    if not legacy_path or not os.path.exists(legacy_path) or os.path.exists(log.path):
+        return
+
+    with open(legacy_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    log.rewrite(to_records(data))
+    os.replace(legacy_path, f"{legacy_path}.bak")
+
+
+def _tokenize(text: str) -> tuple:
+    return tuple(dict.fromkeys(re.findall(r"\w+", text.lower())))
+
+
+class HistoryIndex:
+    # prompt terurut terlama..terbaru + index kata (terurut) untuk pencarian
+    # prefix/fuzzy tanpa memindai semua prompt
+    def __init__(self, limit: int = HISTORY_LIMIT):
+        self.limit = limit
+        self._prompts = OrderedDict()  # prompt -> (urutan, kata)
+        self._words = []               # kata unik, terurut untuk bisect
+        self._postings = {}            # kata -> set prompt
+        self._seq = 0
+
+    def __len__(self) -> int:
+        return len(self._prompts)
+
+    def __iter__(self):
+        return iter(self._prompts)
+
+    def add(self, prompt: str):
+        self._seq += 1
+        if prompt in self._prompts:
+            self._prompts[prompt] = (self._seq, self._prompts[prompt][1])
+            self._prompts.move_to_end(prompt)
+            return
+
+        words = _tokenize(prompt)
+        self._prompts[prompt] = (self._seq, words)
+        for word in words:
+            if word not in self._postings:
+                self._postings[word] = set()
+                bisect.insort(self._words, word)
+            self._postings[word].add(prompt)
+
+        while len(self._prompts) > self.limit:
+            old, (_, old_words) = self._prompts.popitem(last=False)
+            for word in old_words:
+                self._postings[word].discard(old)
+                if not self._postings[word]:
+                    del self._postings[word]
+                    del self._words[bisect.bisect_left(self._words, word)]
+
+    def recent(self, offset: int = 0, limit: int = None) -> list:
+        end = None if limit is None else offset + limit
+        return list(islice(reversed(self._prompts), offset, end))
+
+    def _prefix(self, token: str) -> set:
+        found = set()
+        idx = bisect.bisect_left(self._words, token)
+        while idx < len(self._words) and self._words[idx].startswith(token):
+            found |= self._postings[self._words[idx]]
+            idx += 1
+        return found
+
+    def _fuzzy(self, token: str) -> set:
+        found = set()
+        for word in difflib.get_close_matches(token, self._words, FUZZY_MATCHES, FUZZY_CUTOFF):
+            found |= self._postings[word]
+        return found
+
+    def search(self, query: str, offset: int = 0, limit: int = None) -> list:
+        # setiap kata query harus cocok (awalan kata, atau kata mirip jika typo);
+        # hasil terbaru dulu
+        tokens = _tokenize(query)
+        if not tokens:
+            return self.recent(offset, limit)
+
+        matches = None
+        for token in tokens:
+            found = self._prefix(token) or self._fuzzy(token)
+            matches = found if matches is None else matches & found
+            if not matches:
+                return []
+
+        ranked = sorted(matches, key=lambda p: self._prompts[p][0], reverse=True)
+        end = None if limit is None else offset + limit
+        return ranked[offset:end]
+
+
+class ChatStore:
+    def __init__(self, messages_path: str, history_path: str,
+                 legacy_messages_path: str = None,
+                 legacy_history_path: str = None,
+                 history_limit: int = HISTORY_LIMIT,
+                 message_limit: int = MESSAGE_LIMIT):
+        self.messages = AppendLog(messages_path)
+        self.history = AppendLog(history_path)
+        self.history_limit = history_limit
+        self.message_limit = message_limit
+        self._lock = threading.RLock()
+
+        _migrate_legacy(legacy_messages_path, self.messages, list)
+        # history lama tersimpan terbaru-dulu, log menyimpan terlama-dulu
+        _migrate_legacy(
+            legacy_history_path,
+            self.history,
+            lambda items: [{"prompt": p} for p in reversed(items)]
+        )
+
+        self._build_index()
+
+    def _build_index(self):
+        # prompt -> [offset awal, offset akhir] giliran terakhir prompt tsb
+        # (offset akhir None berarti giliran masih berlanjut sampai EOF);
+        # offset hanya berlaku di proses ini, jadi satu tenant = satu proses
+        self._turns = {}
+        self._open_turn = None
+        self._message_count = 0
+        for offset, message in self.messages.scan():
+            self._index_message(offset, message)
+
+        # prompt terurut terlama..terbaru, duplikat dibuang
+        self._history = HistoryIndex(self.history_limit)
+        self._history_lines = 0
+        for _, record in self.history.scan():
+            self._remember(record["prompt"])
+            self._history_lines += 1
+
+    def _index_message(self, offset: int, message: dict):
+        self._message_count += 1
+        if message.get("role") != "user":
+            return
+
+        if self._open_turn is not None:
+            self._open_turn[1] = offset
+        self._open_turn = [offset, None]
+        self._turns[message["content"]] = self._open_turn
+
+    def _remember(self, prompt: str):
+        self._history.add(prompt)
+
+    # ---------- messages ----------
+    def load_messages(self) -> list:
+        with span("store.load"):
+            return self.messages.read()
+
+    def append_message(self, message: dict):
+        with span("store.append"), self._lock:
+            offset = self.messages.append(message)
+            self._index_message(offset, message)
+
+            if self._message_count > self.message_limit + MESSAGE_COMPACT_SLACK:
+                self.compact()
+
+    def load_turn(self, prompt: str) -> list:
+        # hanya baca potongan file milik giliran prompt ini
+        with span("store.load_turn"):
+            with self._lock:
+                offsets = self._turns.get(prompt)
+                if offsets is None:
+                    return []
+                start, end = offsets
+            return self.messages.read_range(start, end)
+
+    # ---------- history ----------
+    def load_history(self) -> list:
+        with self._lock:
+            return self._history.recent()
+
+    def search_history(self, query: str = "", offset: int = 0, limit: int = None) -> list:
+        # satu halaman history (terbaru dulu), difilter query jika ada
+        with self._lock:
+            return self._history.search(query, offset, limit)
+
+    def add_history(self, prompt: str):
+        with self._lock:
+            self.history.append({"prompt": prompt})
+            self._history_lines += 1
+            self._remember(prompt)
+
+            if self._history_lines - len(self._history) > HISTORY_COMPACT_SLACK:
+                self.compact()
+
+    # ---------- maintenance ----------
+    def compact(self):
+        with self._lock, self.messages.locked(), self.history.locked():
+            messages = trim_messages(self.messages.read(), self.message_limit)
+            self.messages.rewrite(messages)
+            self.history.rewrite([{"prompt": p} for p in self._history])
+            self._build_index()
+
+    def clear(self):
+        with self._lock:
+            self.messages.clear()
+            self.history.clear()
+            self._build_index()
+
+
+def _safe_tenant_id(tenant_id: str) -> str:
+    tenant_id = re.sub(r"[^A-Za-z0-9_-]", "", tenant_id or "")[:64]
+    return tenant_id or DEFAULT_TENANT
+
+
+class StoreRegistry:
+    def __init__(self, base_dir: str = DATA_DIR, max_open: int = MAX_OPEN_STORES):
+        self.base_dir = base_dir
+        self.max_open = max_open
+        self._stores = OrderedDict()
+        self._lock = threading.Lock()
+
+    def tenant_dir(self, tenant_id: str) -> str:
+        # shard 2 karakter hash supaya satu folder tidak berisi ribuan tenant
+        shard = hashlib.sha1(tenant_id.encode("utf-8")).hexdigest()[:2]
+        return os.path.join(self.base_dir, shard, tenant_id)
+
+    def tenant_ids(self):
+        # tenant yang punya folder di disk (termasuk yang belum dibuka)
+        if not os.path.isdir(self.base_dir):
+            return
+        for shard in sorted(os.listdir(self.base_dir)):
+            shard_dir = os.path.join(self.base_dir, shard)
+            if os.path.isdir(shard_dir):
+                yield from sorted(os.listdir(shard_dir))
+
+    def _has_legacy_data(self) -> bool:
+        default_dir = self.tenant_dir(DEFAULT_TENANT)
+        candidates = [
+            LEGACY_MESSAGES_FILE, LEGACY_HISTORY_FILE,
+            LEGACY_MESSAGES_LOG, LEGACY_HISTORY_LOG,
+            os.path.join(default_dir, MESSAGES_FILE),
+            os.path.join(default_dir, HISTORY_FILE),
+        ]
+        return any(os.path.exists(path) for path in candidates)
+
+    def new_tenant_id(self) -> str:
+        # session pertama setelah upgrade mewarisi data lama (tenant default),
+        # session berikutnya mendapat tenant baru
+        with self._lock:
+            marker = os.path.join(self.base_dir, DEFAULT_CLAIM_FILE)
+            if self._has_legacy_data() and not os.path.exists(marker):
+                os.makedirs(self.base_dir, exist_ok=True)
+                with open(marker, "w", encoding="utf-8"):
+                    pass
+                return DEFAULT_TENANT
+        return uuid.uuid4().hex
+
+    def get(self, tenant_id: str) -> ChatStore:
+        tenant_id = _safe_tenant_id(tenant_id)
+
+        with self._lock:
+            store = self._stores.get(tenant_id)
+            if store is not None:
+                self._stores.move_to_end(tenant_id)
+                return store
+
+            # folder tenant dibuat saat pesan pertama ditulis: kunjungan tanpa
+            # pesan tidak meninggalkan folder kosong
+            folder = self.tenant_dir(tenant_id)
+
+            # data lama (satu file global) menjadi milik tenant default
+            legacy = tenant_id == DEFAULT_TENANT
+            if legacy:
+                for old, new in ((LEGACY_MESSAGES_LOG, MESSAGES_FILE),
+                                 (LEGACY_HISTORY_LOG, HISTORY_FILE)):
+                    new = os.path.join(folder, new)
+                    if os.path.exists(old) and not os.path.exists(new):
+                        os.makedirs(folder, exist_ok=True)
+                        os.replace(old, new)
+
+            store = ChatStore(
+                os.path.join(folder, MESSAGES_FILE),
+                os.path.join(folder, HISTORY_FILE),
+                legacy_messages_path=LEGACY_MESSAGES_FILE if legacy else None,
+                legacy_history_path=LEGACY_HISTORY_FILE if legacy else None,
+            )
+
+            self._stores[tenant_id] = store
+            while len(self._stores) > self.max_open:
+                self._stores.popitem(last=False)
+            return store
@@ -0,0 +1,225 @@
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # opsional: tanpa OpenTelemetry span hanya masuk metrik Prometheus
+    otel_trace = None
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:
+    PyinstrumentProfiler = None
+
+# on = metrik Prometheus, otel = + span OpenTelemetry, off = tanpa instrumentasi
+TELEMETRY_MODE = os.getenv("LLM_TELEMETRY", "on").lower()
+
+# port endpoint /metrics (format teks Prometheus); 0 = tidak dibuka
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0))
+
+# profiling per request: off | cprofile | pyinstrument
+PROFILE_MODE = os.getenv("LLM_PROFILE", "off").lower()
+PROFILE_DIR = os.getenv("LLM_PROFILE_DIR", "profiles")
+
+METRIC_PREFIX = "seo"
+
+# batas bucket histogram durasi (detik), dari validasi (µs) sampai panggilan LLM
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        # (span, label) -> [hitungan per bucket, total detik, jumlah]
+        self._spans = {}
+        # nama counter -> {label: nilai}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, labels: dict = None):
+        key = (name, _label_key(labels or {}))
+        with self._lock:
+            entry = self._spans.get(key)
+            if entry is None:
+                entry = self._spans[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    entry[0][i] += 1
+            entry[1] += seconds
+            entry[2] += 1
+
+    def inc(self, name: str, value: float = 1, labels: dict = None):
+        key = _label_key(labels or {})
+        with self._lock:
+            counter = self._counters.setdefault(name, {})
+            counter[key] = counter.get(key, 0) + value
+
+    def render_prometheus(self) -> str:
+        metric = f"{METRIC_PREFIX}_span_duration_seconds"
+        lines = [
+            f"# HELP {metric} Durasi span hot path aplikasi.",
+            f"# TYPE {metric} histogram",
+        ]
+        with self._lock:
+            for (name, labels), (counts, total, count) in sorted(self._spans.items()):
+                pairs = (("span", name),) + labels
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(
+                        f"{metric}_bucket{_format_labels(pairs + (('le', repr(bound)),))} "
+                        f"{bucket_count}"
+                    )
+                lines.append(f"{metric}_bucket{_format_labels(pairs + (('le', '+Inf'),))} {count}")
+                lines.append(f"{metric}_sum{_format_labels(pairs)} {total}")
+                lines.append(f"{metric}_count{_format_labels(pairs)} {count}")
+
+            for name, values in sorted(self._counters.items()):
+                counter = f"{METRIC_PREFIX}_{name}_total"
+                lines.append(f"# TYPE {counter} counter")
+                for labels, value in sorted(values.items()):
+                    lines.append(f"{counter}{_format_labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+_tracer = None
+if TELEMETRY_MODE == "otel" and otel_trace is not None:
+    # exporter (OTLP/console) dikonfigurasi oleh SDK atau opentelemetry-instrument
+    _tracer = otel_trace.get_tracer("seo-assistant")
+
+
+@contextmanager
+def span(name: str, **labels):
+    # label boleh ditambah di dalam blok (mis. attrs["cache"] = "hit");
+    # hanya untuk nilai berkardinalitas rendah
+    if TELEMETRY_MODE == "off":
+        yield labels
+        return
+
+    started = time.perf_counter()
+    otel_span = _tracer.start_as_current_span(name) if _tracer else nullcontext()
+    with otel_span as current:
+        try:
+            yield labels
+        finally:
+            registry.observe(name, time.perf_counter() - started, labels)
+            if current is not None:
+                current.set_attributes({k: str(v) for k, v in labels.items()})
+
+
+def observe(name: str, seconds: float, **labels):
+    # durasi yang diukur di luar blok span (mis. waktu ke token pertama)
+    if TELEMETRY_MODE != "off" and seconds is not None:
+        registry.observe(name, seconds, labels)
+
+
+def count(name: str, value: float = 1, **labels):
+    if TELEMETRY_MODE != "off" and value:
+        registry.inc(name, value, labels)
+
+
+# hanya satu profiler aktif per proses: sejak Python 3.12 profiler kedua
+# (thread worker lain) ditolak dengan ValueError
+_profile_lock = threading.Lock()
+
+
+def _start_profiler(stem: str):
+    # mulai profiler, kembalikan fungsi untuk menghentikan & menyimpan hasilnya
+    if PROFILE_MODE == "pyinstrument" and PyinstrumentProfiler is not None:
+        profiler = PyinstrumentProfiler()
+        profiler.start()
+
+        def save():
+            profiler.stop()
+            with open(f"{stem}.html", "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+        return save
+
+    # cprofile (juga fallback jika pyinstrument tidak terpasang)
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def save():
+        profiler.disable()
+        profiler.dump_stats(f"{stem}.prof")
+    return save
+
+
+@contextmanager
+def profiled(name: str):
+    # satu file profil per request di PROFILE_DIR; request yang berjalan saat
+    # profil lain aktif tidak diprofil (di 3.12+ profil mencakup semua thread)
+    if PROFILE_MODE == "off" or not _profile_lock.acquire(blocking=False):
+        yield
+        return
+
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        save = _start_profiler(os.path.join(PROFILE_DIR, f"{name}-{time.time_ns()}"))
+    except Exception:
+        # profiler tidak bisa dimulai (mis. tool profiling lain aktif): lewati
+        save = None
+
+    try:
+        yield
+    finally:
+        try:
+            if save is not None:
+                save()
+        except Exception:
+            pass
+        finally:
+            _profile_lock.release()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+
+        body = registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = "127.0.0.1"):
+    # satu server per proses; None jika port tidak di-set
+    global _server
+    if not port:
+        return None
+
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _server.daemon_threads = True
+            threading.Thread(
+                target=_server.serve_forever, name="metrics-server", daemon=True
+            ).start()
+    return _server
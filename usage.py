@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+
+from storage import AppendLog
+
+# log token per request (JSONL); "off" untuk menonaktifkan file log
+USAGE_FILE = os.getenv("LLM_USAGE_LOG", "llm_usage.jsonl")
+
+# mode yang menghasilkan satu SEO pack penuh; mode lain (repair, variants)
+# adalah panggilan pendek dan dirata-rata terpisah
+PACK_MODES = ("invoke", "stream", "batch", "async")
+
+
+class UsageTracker:
+    def __init__(self, path: str = None):
+        self.log = AppendLog(path) if path else None
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def record(self, prompt_version: str, model: str, mode: str,
+               usage: dict = None, seconds: float = None,
+               first_token_seconds: float = None):
+        usage = usage or {}
+        entry = {
+            "ts": time.time(),
+            "prompt_version": prompt_version,
+            "model": model,
+            "mode": mode,
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+            "seconds": seconds,
+            "first_token_seconds": first_token_seconds,
+        }
+
+        # total per versi prompt, model & jenis panggilan: angka model yang
+        # berbeda dan panggilan pendek tidak dicampur dengan SEO pack penuh
+        kind = "pack" if mode in PACK_MODES else mode
+        with self._lock:
+            totals = self.totals.setdefault((prompt_version, model, kind), {
+                "requests": 0, "input_tokens": 0, "output_tokens": 0,
+                "seconds": 0.0, "timed": 0,
+            })
+            totals["requests"] += 1
+            totals["input_tokens"] += entry["input_tokens"]
+            totals["output_tokens"] += entry["output_tokens"]
+            if seconds is not None:
+                totals["seconds"] += seconds
+                totals["timed"] += 1
+
+        if self.log is not None:
+            self.log.append(entry)
+
+    def summary(self) -> dict:
+        # {versi: {model: {"pack" | "repair" | "variants": rata-rata}}}
+        summary = {}
+        with self._lock:
+            for (version, model, kind), t in self.totals.items():
+                summary.setdefault(version, {}).setdefault(model, {})[kind] = {
+                    "requests": t["requests"],
+                    "avg_input_tokens": t["input_tokens"] / t["requests"],
+                    "avg_output_tokens": t["output_tokens"] / t["requests"],
+                    "avg_seconds": t["seconds"] / t["timed"] if t["timed"] else None,
+                }
+        return summary
+
+
+def create_usage_tracker() -> UsageTracker:
+    path = None if USAGE_FILE.lower() == "off" else USAGE_FILE
+    return UsageTracker(path)
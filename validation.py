@@ -0,0 +1,141 @@
+import os
+import re
+
+from telemetry import span
+
+# =========================================================
+# VALIDATION CONFIG
+# =========================================================
+ALLOWED_KEYWORDS = [
+    "jasa", "produk", "bisnis", "usaha", "brand",
+    "toko", "layanan", "service", "agency",
+    "marketing", "seo", "digital", "online",
+    "website", "aplikasi", "skincare", "makanan",
+    "travel", "tour", "konstruksi", "renovasi"
+]
+
+# kata kerja instruksi lanjutan untuk hasil sebelumnya ("buat lebih formal")
+FOLLOW_UP_KEYWORDS = [
+    "buat", "ubah", "ganti", "tambah", "tambahkan", "kurangi", "perbaiki",
+    "jadikan", "persingkat", "perpanjang", "revisi", "tulis ulang", "lebih",
+    "versi", "formal", "santai", "singkat", "panjang"
+]
+
+# kosakata tambahan (satu istilah per baris, "#" untuk komentar)
+VOCABULARY_FILE = os.getenv("VALIDATION_VOCAB_FILE", "")
+
+MAX_PROMPT_LENGTH = 80
+
+# kata kode harus diawali batas kata (bukan "undefined"), simbol cukup muncul;
+# semua aturan ditulis huruf kecil karena prompt sudah di-lowercase
+FORBIDDEN_WORDS = ["import ", "def ", "select ", "pip install"]
+FORBIDDEN_SUBSTRINGS = ["{", "}", "<", ">", "http", "www"]
+
+# akhiran umum agar "jasanya", "tokoku", "websites" tetap dikenali
+ALLOWED_SUFFIXES = ["nya", "ku", "mu", "s"]
+
+INVALID_CONTEXT_RESPONSE = """
+Input Anda belum sesuai dengan konteks **Search Engine Assistant**,
+Silakan masukkan topik **Produk, Jasa, atau Bisnis**.
+
+Contoh Inputan: Jasa renovasi rumah, Produk skincare anti aging, Jasa pembuatan website UMKM, Travel umroh terpercaya
+
+Gunakan kata benda atau frasa singkat (bukan pertanyaan).
+"""
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def load_vocabulary(path: str) -> list:
+    terms = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0]
+            if line.strip():
+                terms.append(normalize_text(line))
+    return terms
+
+
+def trie_pattern(terms) -> str:
+    # regex berbentuk trie: prefix bersama hanya dicocokkan sekali,
+    # sehingga biaya per posisi tidak ikut naik dengan jumlah istilah
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node) -> str:
+        alternatives = [
+            re.escape(ch) + build(child)
+            for ch, child in sorted(node.items()) if ch
+        ]
+        if not alternatives:
+            return ""
+
+        is_end = "" in node
+        if len(alternatives) == 1 and not is_end:
+            return alternatives[0]
+
+        group = "(?:" + "|".join(alternatives) + ")"
+        return group + "?" if is_end else group
+
+    return build(trie)
+
+
+class ContextValidator:
+    def __init__(self, allowed_terms, forbidden_words=FORBIDDEN_WORDS,
+                 forbidden_substrings=FORBIDDEN_SUBSTRINGS,
+                 max_length: int = MAX_PROMPT_LENGTH):
+        self.max_length = max_length
+
+        allowed = {normalize_text(t) for t in allowed_terms if t.strip()}
+        forbidden = (
+            rf"(?<!\w){trie_pattern(forbidden_words)}"
+            + "|" + trie_pattern(forbidden_substrings)
+        )
+        suffixes = "|".join(ALLOWED_SUFFIXES)
+
+        # satu pass: pola terlarang dicek lebih dulu di setiap posisi
+        self.pattern = re.compile(
+            rf"(?P<forbidden>{forbidden})"
+            rf"|(?P<allowed>(?<!\w){trie_pattern(allowed)}(?:{suffixes})?(?!\w))"
+        )
+
+    def is_valid(self, prompt: str) -> bool:
+        prompt = normalize_text(prompt)
+
+        if len(prompt) > self.max_length:
+            return False
+
+        found = False
+        for match in self.pattern.finditer(prompt):
+            if match.lastgroup == "forbidden":
+                return False
+            found = True
+        return found
+
+
+def build_validator(vocabulary_file: str = VOCABULARY_FILE) -> ContextValidator:
+    terms = list(ALLOWED_KEYWORDS)
+    if vocabulary_file:
+        terms += load_vocabulary(vocabulary_file)
+    return ContextValidator(terms)
+
+
+validator = build_validator()
+
+
+def is_marketing_context(prompt: str) -> bool:
+    with span("validate"):
+        return validator.is_valid(prompt)
+
+
+follow_up_validator = ContextValidator(FOLLOW_UP_KEYWORDS)
+
+
+def is_follow_up(prompt: str) -> bool:
+    return follow_up_validator.is_valid(prompt)
@@ -0,0 +1,122 @@
+import os
+import re
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import BaseModel, Field
+
+from formatter import MarketingSections
+from schema import FIELD_DESCRIPTIONS, FIELD_LIMITS
+
+# jumlah variasi judul/meta/CTA per topik (1–5)
+VARIANT_COUNT = min(5, max(1, int(os.getenv("LLM_VARIANTS", 3))))
+
+# kandidat tambahan yang diminta supaya scorer punya pilihan saat menyaring
+CANDIDATE_EXTRA = 2
+
+# suhu lebih tinggi dari generate utama supaya variasi benar-benar berbeda
+VARIANT_TEMPERATURE = float(os.getenv("LLM_VARIANT_TEMPERATURE", 0.9))
+
+# kata pertama snippet yang ikut dikirim sebagai konteks (snippet dipakai ulang)
+SNIPPET_CONTEXT_WORDS = 60
+
+# penalti per kemiripan (Jaccard kata) dengan variasi yang sudah terpilih
+DUPLICATE_PENALTY = 2.0
+
+VARIANT_FIELDS = ("seo_title", "meta_description", "cta")
+
+
+class Variant(BaseModel):
+    seo_title: str = Field(description=FIELD_DESCRIPTIONS["seo_title"],
+                           json_schema_extra={"maxLength": FIELD_LIMITS["seo_title"]})
+    meta_description: str = Field(description=FIELD_DESCRIPTIONS["meta_description"],
+                                  json_schema_extra={"maxLength": FIELD_LIMITS["meta_description"]})
+    cta: str = Field(description=FIELD_DESCRIPTIONS["cta"])
+
+
+class VariantSet(BaseModel):
+    variants: list[Variant] = Field(description="Variasi yang saling berbeda sudut pandang")
+
+
+VARIANT_SYSTEM_PROMPT = SystemMessage(content=(
+    "Kamu menulis alternatif SEO title, meta description, dan CTA berbahasa Indonesia "
+    "untuk konten yang sudah ada. Setiap variasi memakai sudut pandang berbeda "
+    "(manfaat, harga, kepercayaan, lokasi, urgensi), memuat focus keyword, "
+    "mematuhi batas karakter, tanpa menyebut AI/model."
+))
+
+
+def build_variant_messages(user_prompt: str, sections: MarketingSections,
+                           count: int) -> list:
+    snippet = " ".join((sections.content_snippet or "").split()[:SNIPPET_CONTEXT_WORDS])
+    lines = [
+        f"Topik: {user_prompt}",
+        f"Focus keyword: {sections.focus_keyword or '-'}",
+        f"Ringkasan konten: {snippet}",
+        "",
+        "Versi saat ini (jangan diulang):",
+        f"- SEO title: {sections.seo_title or '-'}",
+        f"- Meta description: {sections.meta_description or '-'}",
+        f"- CTA: {sections.cta or '-'}",
+        "",
+        f"Buat {count} variasi baru.",
+    ]
+    return [VARIANT_SYSTEM_PROMPT, HumanMessage(content="\n".join(lines))]
+
+
+def _words(text: str) -> set:
+    return set(re.findall(r"\w+", (text or "").lower()))
+
+
+def similarity(a: dict, b: dict) -> float:
+    # Jaccard kata gabungan judul + meta + CTA
+    words_a = _words(" ".join(a.get(f) or "" for f in VARIANT_FIELDS))
+    words_b = _words(" ".join(b.get(f) or "" for f in VARIANT_FIELDS))
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def score_variant(variant: dict, focus_keyword: str = None) -> float:
+    # None = melanggar batas keras / field kosong (dibuang)
+    score = 0.0
+    for name, limit in FIELD_LIMITS.items():
+        value = variant.get(name) or ""
+        if not value or len(value) > limit:
+            return None
+        # makin dekat ke batas, makin banyak ruang yang terpakai di SERP
+        score += len(value) / limit
+
+    if not variant.get("cta"):
+        return None
+
+    keyword = (focus_keyword or "").lower()
+    if keyword:
+        score += 1.0 if keyword in variant["seo_title"].lower() else 0.0
+        score += 0.5 if keyword in variant["meta_description"].lower() else 0.0
+    return score
+
+
+def rank_variants(variants: list, focus_keyword: str = None,
+                  reference: dict = None, limit: int = VARIANT_COUNT) -> list:
+    # greedy: ambil skor tertinggi setelah penalti kemiripan dengan yang sudah
+    # terpilih (dan dengan versi utama), supaya hasil akhir tidak kembar
+    candidates = []
+    for variant in variants:
+        score = score_variant(variant, focus_keyword)
+        if score is not None:
+            candidates.append((score, variant))
+
+    chosen = []
+    seen = [reference] if reference else []
+    while candidates and len(chosen) < limit:
+        best_idx, best_score = None, None
+        for idx, (score, variant) in enumerate(candidates):
+            penalty = max((similarity(variant, other) for other in seen), default=0.0)
+            adjusted = score - DUPLICATE_PENALTY * penalty
+            if best_score is None or adjusted > best_score:
+                best_idx, best_score = idx, adjusted
+
+        _, variant = candidates.pop(best_idx)
+        chosen.append({**variant, "score": round(best_score, 3)})
+        seen.append(variant)
+    return chosen